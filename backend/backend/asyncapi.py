@@ -0,0 +1,64 @@
+"""
+Helpers for async-native JSON endpoints.
+
+DRF views are sync-only, so the async variants of hot endpoints are plain
+Django coroutines. ``async_api_view`` gives them what APIView provides for
+the sync views: method checks, JWT authentication, CSRF exemption, and JSON
+error responses in the same ``{'error': ...}`` shape.
+"""
+
+import json
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from users.authentication import aauthenticate
+
+
+def json_response(data, status=200):
+    """
+    Render ``data`` exactly as DRF's JSONRenderer would
+    """
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def error_response(message, status, **extra):
+    return json_response({'error': message, **extra}, status=status)
+
+
+def read_json(request):
+    """
+    Return the JSON object sent in the request body, or None if it is not one
+    """
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def async_api_view(methods=('GET',), authenticated=False):
+    """
+    Decorate an ``async def view(request, ...)`` returning a response
+    """
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return json_response({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+            try:
+                user = await aauthenticate(request)
+            except (AuthenticationFailed, InvalidToken) as e:
+                # Same body as DRF's response for these exceptions
+                return json_response(e.detail if isinstance(e.detail, dict) else {'detail': e.detail}, status=401)
+            if authenticated and user is None:
+                return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+            if user is not None:
+                request.user = user
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
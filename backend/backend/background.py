@@ -0,0 +1,118 @@
+"""
+Shared executors for work that should not run on the request thread.
+
+Threads are used for I/O-bound side effects (S3 uploads, database follow-ups),
+and a process pool is used for CPU-bound work such as image resizing so that
+large batches never compete with web workers for the GIL.
+
+Async views run their queries on a separate bounded thread pool. Django's
+async ORM sends every query through one shared thread, so under ASGI a
+worker's queries would otherwise run one at a time.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from .metrics import BACKGROUND_JOBS_PENDING
+
+logger = logging.getLogger('django')
+
+_lock = threading.Lock()
+_thread_executor = None
+_database_executor = None
+_process_pool = None
+
+
+def get_thread_executor():
+    """
+    Return the process-wide thread pool, creating it on first use.
+    """
+    global _thread_executor
+    if _thread_executor is None:
+        with _lock:
+            if _thread_executor is None:
+                _thread_executor = ThreadPoolExecutor(
+                    max_workers=settings.BACKGROUND_THREAD_WORKERS,
+                    thread_name_prefix='background'
+                )
+    return _thread_executor
+
+
+def get_database_executor():
+    """
+    Return the thread pool async views run their queries on, creating it on first use.
+    """
+    global _database_executor
+    if _database_executor is None:
+        with _lock:
+            if _database_executor is None:
+                _database_executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_DATABASE_THREADS,
+                    thread_name_prefix='database'
+                )
+    return _database_executor
+
+
+def get_process_pool():
+    """
+    Return the process pool used for CPU-bound jobs, creating it on first use.
+
+    Workers are spawned rather than forked so that they never inherit database
+    connections or locks held by the web worker's threads.
+    """
+    global _process_pool
+    if _process_pool is None:
+        with _lock:
+            if _process_pool is None:
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=settings.BACKGROUND_PROCESS_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _process_pool
+
+
+def _run_job(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Background job {func.__name__} failed")
+        raise
+    finally:
+        BACKGROUND_JOBS_PENDING.labels(func.__name__).dec()
+        # Threads in the pool are reused, so never leave a connection open
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Run ``func(*args, **kwargs)`` on the background thread pool.
+
+    Returns the ``Future`` for callers that want to wait on the result.
+    """
+    BACKGROUND_JOBS_PENDING.labels(func.__name__).inc()
+    return get_thread_executor().submit(_run_job, func, args, kwargs)
+
+
+def _run_query(func, args, kwargs):
+    # Each thread keeps its connection like a request thread does: reused
+    # until CONN_MAX_AGE, and health-checked before it is used again
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_database_thread(func, *args, **kwargs):
+    """
+    Await ``func(*args, **kwargs)`` run on the database thread pool.
+
+    Context variables such as the replica routing flag carry over.
+    """
+    return await sync_to_async(_run_query, thread_sensitive=False, executor=get_database_executor())(func, args, kwargs)
@@ -0,0 +1,125 @@
+"""
+Read-replica routing for read-only endpoints.
+
+``ReplicaRoutingMiddleware`` picks a random replica for GET/HEAD requests to
+the URL names listed in ``DATABASE_REPLICA_ROUTES``, and ``ReplicaRouter``
+sends every read of that request to it. Related rows are then read at one
+replica's lag rather than several. Everything else, including every read
+inside a transaction and any read after the request has written, stays on
+the primary.
+
+Read-your-writes: when a signed-in user's write succeeds, they are pinned to
+the primary for ``DATABASE_REPLICA_STICKY_SECONDS`` so a page loaded right
+after booking or cancelling never shows replica lag. Pins live in the
+default cache, which must be shared (Redis, Memcached) when several
+instances serve traffic.
+"""
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .ratelimit import get_user_key
+
+# The replica reads in the current request go to, or None for the primary
+_replica = ContextVar('replica', default=None)
+
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+def pin_key(user_key):
+    return f"db:pin:{user_key}"
+
+
+class ReplicaRouter:
+    """
+    Route reads of marked requests to a replica, and everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = _replica.get()
+        if replica is None:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Reads inside a transaction must see its writes and locks
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        # Anything read after a write in this request must see it
+        _replica.set(None)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decide per request whether reads may use a replica, and pin users who
+    just wrote to the primary.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.routes = set(settings.DATABASE_REPLICA_ROUTES)
+        self.sticky_seconds = settings.DATABASE_REPLICA_STICKY_SECONDS
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _replica.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica.reset(token)
+        user_key = self.user_to_pin(request, response)
+        if user_key is not None:
+            cache.set(pin_key(user_key), True, timeout=self.sticky_seconds)
+        return response
+
+    async def __acall__(self, request):
+        token = _replica.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica.reset(token)
+        user_key = self.user_to_pin(request, response)
+        if user_key is not None:
+            await cache.aset(pin_key(user_key), True, timeout=self.sticky_seconds)
+        return response
+
+    def user_to_pin(self, request, response):
+        """
+        Return the user key to pin to the primary after a successful write, or None
+        """
+        if request.method in UNSAFE_METHODS and response.status_code < 400 and self.sticky_seconds:
+            return get_user_key(request, {})
+        return None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        replicas = replica_aliases()
+        if request.method not in ('GET', 'HEAD') or not replicas:
+            return None
+        if not request.resolver_match or request.resolver_match.url_name not in self.routes:
+            return None
+        user_key = get_user_key(request, {})
+        if user_key is not None and cache.get(pin_key(user_key)):
+            return None
+        _replica.set(random.choice(replicas))
+        return None
@@ -0,0 +1,47 @@
+"""
+Fast path for load balancer health checks.
+
+``HealthCheckMiddleware`` sits first in MIDDLEWARE and answers
+``HEALTH_CHECK_PATH`` before sessions, CORS, rate limiting, URL resolution,
+authentication or the database are touched, so probes stay cheap and keep
+passing while the database is slow. It only says the worker can serve
+requests; the database has its own monitoring.
+"""
+
+import json
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+HEALTHY_BODY = json.dumps({
+    'status': 'healthy',
+    'message': 'Service is running'
+})
+
+
+class HealthCheckMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.path = settings.HEALTH_CHECK_PATH
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.path == self.path:
+            return self.healthy()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path == self.path:
+            return self.healthy()
+        return await self.get_response(request)
+
+    def healthy(self):
+        return HttpResponse(HEALTHY_BODY, content_type='application/json')
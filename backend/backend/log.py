@@ -0,0 +1,217 @@
+"""
+Non-blocking, structured logging.
+
+``configure_logging`` (LOGGING_CONFIG) applies LOGGING as usual, then moves
+every logger's handlers behind one bounded queue. A request thread only
+interpolates the message and enqueues the record; a ``QueueListener`` thread
+does the JSON formatting, file writes and rotation. When the queue is full
+records are dropped and counted instead of blocking the request.
+
+Two filters keep the volume bounded under load. Both run on the logging
+thread before a record is enqueued, and neither ever drops ERROR records:
+
+* ``SamplingFilter`` keeps a fraction of hot-path records, the ones logged
+  with ``extra=HOT_PATH``.
+* ``RateLimitFilter`` caps records per second for each logger; the next
+  record let through reports how many were suppressed.
+"""
+
+import atexit
+import json
+import logging
+import logging.config
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Pass as ``extra`` on high-volume records (list and search endpoints) to sample them
+HOT_PATH = {'hot_path': True}
+
+# LogRecord attributes that are not user-supplied extras
+RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'hot_path'}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, with any ``extra`` fields included
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep ``rate`` of the records marked HOT_PATH below WARNING
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not getattr(record, 'hot_path', False):
+            return True
+        return random.random() < self.rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    A token bucket per logger name, letting ``per_second`` records through
+    on average with bursts of up to ``burst``. ERROR and above always pass.
+    """
+
+    def __init__(self, per_second=100, burst=200):
+        super().__init__()
+        self.per_second = float(per_second)
+        self.burst = float(burst)
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated, suppressed = self.buckets.get(record.name, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - updated) * self.per_second)
+            if tokens < 1:
+                self.buckets[record.name] = (tokens, now, suppressed + 1)
+                return False
+            self.buckets[record.name] = (tokens - 1, now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Enqueue records for the listener without ever blocking. Each record
+    carries the handlers its logger had, so one queue serves every logger.
+    """
+
+    dropped = 0
+
+    def __init__(self, log_queue, targets):
+        super().__init__(log_queue)
+        self.targets = tuple(targets)
+
+    def prepare(self, record):
+        # Interpolate now, while the arguments are as the caller saw them.
+        # Formatting to JSON is left to the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait((self.targets, record))
+        except queue.Full:
+            BoundedQueueHandler.dropped += 1
+
+
+class FanOutQueueListener(QueueListener):
+    """
+    Pass each record to the handlers it was queued for
+    """
+
+    def handle(self, item):
+        targets, record = item
+        for handler in targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def enqueue_sentinel(self):
+        # Wait for room rather than lose the stop signal on a full queue
+        self.queue.put(self._sentinel)
+
+
+_listener = None
+_queue_handlers = []
+
+
+def _start_listener(queue_size):
+    global _listener
+    log_queue = queue.Queue(maxsize=queue_size)
+    _listener = FanOutQueueListener(log_queue)
+    _listener.start()
+    return log_queue
+
+
+def _restart_in_child():
+    # The listener thread does not survive fork, and its queue may have been
+    # locked mid-operation; give the child a fresh pair
+    global _listener
+    if _listener is None:
+        return
+    _listener = None
+    log_queue = _start_listener(_queue_handlers[0].queue.maxsize)
+    for handler in _queue_handlers:
+        handler.queue = log_queue
+
+
+def stop_listener():
+    """
+    Flush queued records and stop the listener thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records():
+    """
+    Records dropped in this process because the queue was full
+    """
+    return BoundedQueueHandler.dropped
+
+
+def configure_logging(config):
+    """
+    Apply a LOGGING dict, then route every logger through the queue.
+
+    ``config['queue']`` holds ``{'enabled': bool, 'size': int}``; when
+    disabled, handlers run on the calling thread as configured.
+    """
+    config = dict(config)
+    options = config.pop('queue', {})
+    logging.config.dictConfig(config)
+    if not options.get('enabled', True):
+        return
+
+    stop_listener()
+    log_queue = _start_listener(options.get('size', 10000))
+    by_handlers = {}
+    loggers = [logging.getLogger()] + [logging.getLogger(name) for name in config.get('loggers', {})]
+    for logger in loggers:
+        if not logger.handlers:
+            continue
+        handlers = tuple(logger.handlers)
+        if handlers not in by_handlers:
+            by_handlers[handlers] = BoundedQueueHandler(log_queue, handlers)
+        logger.handlers = [by_handlers[handlers]]
+    _queue_handlers[:] = by_handlers.values()
+
+
+atexit.register(stop_listener)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_in_child)
@@ -0,0 +1,126 @@
+"""
+Prometheus metrics, served at ``/metrics`` in the text exposition format.
+
+``MetricsMiddleware`` records latency, request and error counts per URL name
+and the database queries counted by QueryBudgetMiddleware. Domain code
+records bookings, cancellations, background jobs, cache lookups and rate
+limiter decisions through the metrics below.
+
+Several worker processes: when PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py
+points it at shared memory), every process writes its samples to mmap'd
+files there and ``/metrics`` aggregates them all, whichever worker serves
+the scrape. Otherwise samples stay in process memory (runserver, tests).
+Either way recording is a lock per sample, never a lock across requests.
+"""
+
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by URL name',
+    ['route', 'method']
+)
+REQUESTS = Counter(
+    'http_requests', 'Requests by URL name, method and status code',
+    ['route', 'method', 'status']
+)
+REQUEST_ERRORS = Counter(
+    'http_request_errors', 'Responses with a 5xx status by URL name',
+    ['route']
+)
+DB_QUERIES = Counter(
+    'db_queries', 'SQL queries run by requests, by URL name',
+    ['route']
+)
+DB_QUERY_SECONDS = Counter(
+    'db_query_duration_seconds', 'Time requests spent in the database, by URL name',
+    ['route']
+)
+
+BOOKINGS_CREATED = Counter(
+    'bookings_created', 'Bookings committed, by source (direct or waitlist)',
+    ['source']
+)
+BOOKINGS_CANCELLED = Counter('bookings_cancelled', 'Bookings cancelled')
+
+# The confirmation email outbox is the send_booking_confirmation_email job
+BACKGROUND_JOBS_PENDING = Gauge(
+    'background_jobs_pending', 'Jobs queued or running on the background thread pool',
+    ['job'], multiprocess_mode='livesum'
+)
+
+# Hit ratio: rate(cache_lookups_total{result="hit"}) / rate(cache_lookups_total)
+CACHE_LOOKUPS = Counter(
+    'cache_lookups', 'Cache lookups by cache and result (hit or miss)',
+    ['cache', 'result']
+)
+
+RATE_LIMIT_DECISIONS = Counter(
+    'rate_limit_decisions', 'Rate limiter decisions by rule and outcome',
+    ['rule', 'outcome']
+)
+
+
+# Anything else is reported as OTHER so clients cannot grow the label set
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+def record_cache_lookup(cache_name, hits, misses):
+    if hits:
+        CACHE_LOOKUPS.labels(cache_name, 'hit').inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache_name, 'miss').inc(misses)
+
+
+def render():
+    """
+    Return the exposition text for every process sharing the metrics directory
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, elapsed):
+        # URL names keep the label set bounded; raw paths would not
+        route = request.resolver_match.url_name if request.resolver_match else 'unmatched'
+        route = route or 'unnamed'
+        method = request.method if request.method in METHODS else 'OTHER'
+        REQUEST_LATENCY.labels(route, method).observe(elapsed)
+        REQUESTS.labels(route, method, str(response.status_code)).inc()
+        if response.status_code >= 500:
+            REQUEST_ERRORS.labels(route).inc()
+        queries = getattr(request, 'query_stats', None)
+        if queries is not None:
+            DB_QUERIES.labels(route).inc(queries.count)
+            DB_QUERY_SECONDS.labels(route).inc(queries.duration)
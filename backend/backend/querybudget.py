@@ -0,0 +1,181 @@
+"""
+Per-request SQL query accounting and budgets.
+
+``QueryBudgetMiddleware`` counts the queries a request runs and the time
+spent in the database, and reports them:
+
+* in a ``Server-Timing`` header (``db`` and ``app``), visible in the
+  browser's network panel,
+* in a log record per request, sampled like other hot-path records, and
+* in a WARNING when the request goes over its budget, listing the SQL
+  statements it repeated most. Repeats of one fingerprint are the signature
+  of an N+1 loop.
+
+Budgets come from ``QUERY_BUDGET`` and are keyed by URL name like the rate
+limit rules. With ``MODE = 'raise'`` an exceeded budget raises
+``QueryBudgetExceeded`` instead, so test runs fail on a regression.
+
+Queries are recorded by an execute wrapper installed on every connection,
+which reads the current request from a context variable. Queries run for
+the request in other threads (async views, ``sync_to_async``) are counted
+too. Streaming responses only count the queries run before streaming starts.
+The counts are left on ``request.query_stats`` for MetricsMiddleware.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .log import HOT_PATH
+
+logger = logging.getLogger('django')
+
+_request_queries = ContextVar('request_queries', default=None)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """
+    Reduce a statement to its shape: literals become ?, IN lists collapse
+    """
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql.replace('%s', '?')).strip()
+
+
+class RequestQueries:
+    """
+    Queries recorded for one request
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.lock = threading.Lock()
+
+    def add(self, sql, duration):
+        with self.lock:
+            self.count += 1
+            self.duration += duration
+            self.statements[sql] += 1
+
+    def top_repeated(self, limit):
+        """
+        The most repeated statement shapes as (fingerprint, count), repeats only
+        """
+        shapes = Counter()
+        for sql, count in self.statements.items():
+            shapes[fingerprint(sql)] += count
+        return [(shape, count) for shape, count in shapes.most_common(limit) if count > 1]
+
+
+def record_query(execute, sql, params, many, context):
+    queries = _request_queries.get()
+    if queries is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        queries.add(sql, time.perf_counter() - start)
+
+
+def install_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        connection_created.connect(install_wrapper, dispatch_uid='query_budget')
+        for connection in connections.all(initialized_only=True):
+            install_wrapper(connection)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.QUERY_BUDGET['ENABLED']:
+            return self.get_response(request)
+        queries = request.query_stats = RequestQueries()
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        return self.report(request, response, queries, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not settings.QUERY_BUDGET['ENABLED']:
+            return await self.get_response(request)
+        queries = request.query_stats = RequestQueries()
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        return self.report(request, response, queries, time.perf_counter() - start)
+
+    def report(self, request, response, queries, elapsed):
+        config = settings.QUERY_BUDGET
+        db_ms = queries.duration * 1000
+        app_ms = max(0.0, elapsed * 1000 - db_ms)
+        response['Server-Timing'] = (
+            f'db;desc="{queries.count} queries";dur={db_ms:.1f}, app;dur={app_ms:.1f}'
+        )
+
+        route = request.resolver_match.url_name if request.resolver_match else None
+        budget = {**config['DEFAULT'], **config['ROUTES'].get(route, {})}
+        over = []
+        if budget.get('queries') is not None and queries.count > budget['queries']:
+            over.append(f"{queries.count} queries (budget {budget['queries']})")
+        if budget.get('db_ms') is not None and db_ms > budget['db_ms']:
+            over.append(f"{db_ms:.0f} ms in the database (budget {budget['db_ms']} ms)")
+
+        details = {
+            'route': route,
+            'queries': queries.count,
+            'db_ms': round(db_ms, 1),
+            'status_code': response.status_code,
+        }
+        if not over:
+            logger.info("%s %s: %d queries in %.1f ms", request.method, request.path, queries.count, db_ms,
+                        extra={**details, **HOT_PATH})
+            return response
+
+        repeated = queries.top_repeated(config['TOP_FINGERPRINTS'])
+        message = f"Query budget exceeded by {request.method} {request.path}: {', '.join(over)}"
+        if config['MODE'] == 'raise':
+            listing = ''.join(f"\n  {count}x {shape}" for shape, count in repeated)
+            raise QueryBudgetExceeded(message + listing)
+        logger.warning(message, extra={
+            **details,
+            'repeated_queries': [{'count': count, 'sql': shape} for shape, count in repeated],
+        })
+        return response
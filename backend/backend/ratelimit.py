@@ -0,0 +1,273 @@
+"""
+Rate limiting and load shedding for expensive endpoints.
+
+Requests are matched to a rule by URL name. Each rule can combine:
+
+* a per-IP token bucket and a per-user token bucket, answered with 429 when
+  empty, and
+* a per-endpoint concurrency cap, answered with 503 when every slot in this
+  worker is busy.
+
+Rejections happen in middleware, before authentication, parsing or password
+hashing run. Buckets live in a pluggable store: the default keeps them in
+process memory, ``CacheRateLimitStore`` shares them through Django's cache.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .metrics import RATE_LIMIT_DECISIONS
+
+logger = logging.getLogger('django')
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Parse a rate such as '10/m' into (capacity, tokens refilled per second)
+    """
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    return int(count), int(count) / PERIODS[period[0]]
+
+
+class InMemoryRateLimitStore:
+    """
+    Token buckets kept in this process. Limits apply per worker process.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate):
+        """
+        Take one token from the bucket. Returns (allowed, retry_after_seconds)
+        """
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (capacity, now, capacity, refill_rate))[:2]
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            if tokens >= 1:
+                allowed, retry_after = True, 0
+                tokens -= 1
+            else:
+                allowed, retry_after = False, (1 - tokens) / refill_rate
+            self.buckets[key] = (tokens, now, capacity, refill_rate)
+            if len(self.buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        for key in [key for key, (tokens, updated, capacity, refill_rate) in self.buckets.items()
+                    if tokens + (now - updated) * refill_rate >= capacity]:
+            del self.buckets[key]
+
+
+class CacheRateLimitStore:
+    """
+    Buckets shared across workers and instances through a Django cache.
+
+    Uses atomic ``add``/``incr`` so it works with Redis or Memcached. Each
+    bucket is approximated by a fixed window of ``capacity / refill_rate``
+    seconds that admits ``capacity`` requests.
+    """
+
+    def __init__(self, cache_alias='default'):
+        self.cache = caches[cache_alias]
+
+    def consume(self, key, capacity, refill_rate):
+        window = max(1, round(capacity / refill_rate))
+        now = time.time()
+        window_start = int(now // window) * window
+        cache_key = f"ratelimit:{key}:{window_start}"
+        self.cache.add(cache_key, 0, timeout=window + 1)
+        try:
+            count = self.cache.incr(cache_key)
+        except ValueError:
+            # Key expired between add and incr
+            self.cache.add(cache_key, 1, timeout=window + 1)
+            count = 1
+        if count <= capacity:
+            return True, 0
+        return False, window_start + window - now
+
+
+class RateLimitStats:
+    """
+    Thread-safe counters per rule, exposed by ``rate_limit_stats``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(lambda: defaultdict(int))
+        self.in_flight = defaultdict(int)
+
+    def incr(self, rule, outcome):
+        with self.lock:
+            self.counters[rule][outcome] += 1
+        RATE_LIMIT_DECISIONS.labels(rule, outcome).inc()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                rule: {**counts, 'in_flight': self.in_flight[rule]}
+                for rule, counts in self.counters.items()
+            }
+
+
+stats = RateLimitStats()
+
+
+def get_client_ip(request):
+    """
+    Return the client address, honouring X-Forwarded-For only for the number
+    of proxies (e.g. the load balancer) configured as trusted
+    """
+    num_proxies = settings.RATE_LIMIT['NUM_PROXIES']
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if num_proxies and forwarded_for:
+        addresses = [address.strip() for address in forwarded_for.split(',')]
+        return addresses[-min(num_proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def get_user_key(request, rule):
+    """
+    Return the identity used for the per-user bucket, or None.
+
+    Login rules key on the submitted username, so guessing one account's
+    password from many IPs is still limited. Other rules key on the user id
+    of a valid access token; anonymous requests only get the per-IP bucket.
+    """
+    if rule.get('user_field'):
+        value = get_submitted_field(request, rule['user_field'])
+        return f"name:{value}" if value else None
+
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        token = AccessToken(header[len('Bearer '):])
+    except TokenError:
+        return None
+    return f"id:{token.get(api_settings.USER_ID_CLAIM)}"
+
+
+def get_submitted_field(request, field):
+    """
+    Read a field from a JSON or form body. The body stays readable for DRF.
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data.get(field) if isinstance(data, dict) else None
+    return request.POST.get(field)
+
+
+class RateLimitMiddleware:
+    """
+    Reject or shed requests to rate-limited endpoints before the view runs.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        config = settings.RATE_LIMIT
+        self.enabled = config['ENABLED']
+        self.store = import_string(config['STORE'])(**config.get('STORE_OPTIONS', {}))
+        self.rules = {}
+        self.semaphores = {}
+        for name, rule in config['RULES'].items():
+            self.rules[name] = {
+                **rule,
+                'ip_rate': parse_rate(rule.get('ip_rate')),
+                'user_rate': parse_rate(rule.get('user_rate')),
+            }
+            if rule.get('concurrency'):
+                self.semaphores[name] = threading.BoundedSemaphore(rule['concurrency'])
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self.release_slot(request)
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            self.release_slot(request)
+
+    def release_slot(self, request):
+        rule_name = getattr(request, '_rate_limit_slot', None)
+        if rule_name is not None:
+            with stats.lock:
+                stats.in_flight[rule_name] -= 1
+            self.semaphores[rule_name].release()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not self.enabled or request.method == 'OPTIONS':
+            return None
+        rule_name = request.resolver_match.url_name if request.resolver_match else None
+        rule = self.rules.get(rule_name)
+        if rule is None:
+            return None
+
+        if rule['ip_rate']:
+            allowed, retry_after = self.store.consume(f"{rule_name}:ip:{get_client_ip(request)}", *rule['ip_rate'])
+            if not allowed:
+                return self.too_many_requests(rule_name, 'limited_ip', retry_after)
+
+        if rule['user_rate']:
+            user_key = get_user_key(request, rule)
+            if user_key is not None:
+                allowed, retry_after = self.store.consume(f"{rule_name}:user:{user_key}", *rule['user_rate'])
+                if not allowed:
+                    return self.too_many_requests(rule_name, 'limited_user', retry_after)
+
+        semaphore = self.semaphores.get(rule_name)
+        if semaphore is not None:
+            if not semaphore.acquire(blocking=False):
+                stats.incr(rule_name, 'shed')
+                logger.warning(f"Shedding request to {rule_name}: concurrency cap reached")
+                response = JsonResponse({'error': 'Server is busy, please retry shortly'}, status=503)
+                response['Retry-After'] = '1'
+                return response
+            request._rate_limit_slot = rule_name
+            with stats.lock:
+                stats.in_flight[rule_name] += 1
+
+        stats.incr(rule_name, 'allowed')
+        return None
+
+    def too_many_requests(self, rule_name, outcome, retry_after):
+        stats.incr(rule_name, outcome)
+        response = JsonResponse({'error': 'Too many requests, please slow down'}, status=429)
+        response['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+        return response
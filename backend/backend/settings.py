@@ -25,10 +25,35 @@ LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
 
 # Logging Configuration
+# Handlers run on a background thread behind a bounded queue (see backend/log.py)
+LOGGING_CONFIG = 'backend.log.configure_logging'
+# 'json' for structured logs, 'verbose' for plain text
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'queue': {
+        'enabled': os.getenv('LOG_QUEUE_ENABLED', 'True') == 'True',
+        # Records past this many waiting are dropped rather than block requests
+        'size': int(os.getenv('LOG_QUEUE_SIZE', 10000)),
+    },
+    'filters': {
+        # Fraction of hot-path records (logged with extra=HOT_PATH) that are kept
+        'sample_hot_path': {
+            '()': 'backend.log.SamplingFilter',
+            'rate': float(os.getenv('LOG_HOT_PATH_SAMPLE_RATE', 0.01)),
+        },
+        # Records per second per logger below ERROR, with bursts up to LOG_RATE_BURST
+        'rate_limit': {
+            '()': 'backend.log.RateLimitFilter',
+            'per_second': float(os.getenv('LOG_RATE_PER_SECOND', 100)),
+            'burst': float(os.getenv('LOG_RATE_BURST', 200)),
+        },
+    },
     'formatters': {
+        'json': {
+            '()': 'backend.log.JsonFormatter',
+        },
         'verbose': {
             'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
             'style': '{',
@@ -41,21 +66,24 @@ LOGGING = {
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'simple',
         },
         'file': {
             'class': 'logging.handlers.RotatingFileHandler',
             'filename': LOGS_DIR / 'django.log',
             'maxBytes': 1024 * 1024 * 5,  # 5 MB
             'backupCount': 5,
-            'formatter': 'verbose',
+            'formatter': LOG_FORMAT,
+            # Open the file on the first record rather than at startup
+            'delay': True,
         },
         'error_file': {
             'class': 'logging.handlers.RotatingFileHandler',
             'filename': LOGS_DIR / 'error.log',
             'maxBytes': 1024 * 1024 * 5,  # 5 MB
             'backupCount': 5,
-            'formatter': 'verbose',
+            'formatter': LOG_FORMAT,
+            'delay': True,
             'level': 'ERROR',
         },
     },
@@ -63,6 +91,7 @@ LOGGING = {
         'django': {
             'handlers': ['console', 'file'],
             'level': 'INFO',
+            'filters': ['sample_hot_path', 'rate_limit'],
             'propagate': True,
         },
         'django.request': {
@@ -78,16 +107,19 @@ LOGGING = {
         'restaurants': {
             'handlers': ['console', 'file'],
             'level': 'INFO',
+            'filters': ['sample_hot_path', 'rate_limit'],
             'propagate': False,
         },
         'users': {
             'handlers': ['console', 'file'],
             'level': 'INFO',
+            'filters': ['sample_hot_path', 'rate_limit'],
             'propagate': False,
         },
         'bookings': {
             'handlers': ['console', 'file'],
             'level': 'INFO',
+            'filters': ['sample_hot_path', 'rate_limit'],
             'propagate': False,
         },
     },
@@ -106,7 +138,7 @@ ALLOWED_HOSTS = ["*"]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -123,8 +155,70 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "USER_ID_FIELD": "user_id",
     "USER_ID_CLAIM": "user_id",
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.ClaimsTokenRefreshSerializer",
 }
 
+# Rate limiting and load shedding, keyed by URL name (see backend/ratelimit.py)
+# Rates are '<count>/<s|m|h|d>'; concurrency caps apply per worker process
+RATE_LIMIT = {
+    'ENABLED': os.getenv('RATE_LIMIT_ENABLED', 'True') == 'True',
+    # Use 'backend.ratelimit.CacheRateLimitStore' to share buckets through the cache
+    'STORE': os.getenv('RATE_LIMIT_STORE', 'backend.ratelimit.InMemoryRateLimitStore'),
+    # Number of trusted proxies (e.g. the load balancer) in front of the app.
+    # Set to 1 behind the ALB; with 0 only REMOTE_ADDR is trusted, since any
+    # client can send its own X-Forwarded-For
+    'NUM_PROXIES': int(os.getenv('RATE_LIMIT_NUM_PROXIES', 0)),
+    'RULES': {
+        'login': {'ip_rate': '20/m', 'user_rate': '5/m', 'user_field': 'username', 'concurrency': 4},
+        'token_obtain_pair': {'ip_rate': '20/m', 'user_rate': '5/m', 'user_field': 'email', 'concurrency': 4},
+        'register': {'ip_rate': '10/m', 'concurrency': 4},
+        'restaurant-search': {'ip_rate': '60/m', 'user_rate': '60/m', 'concurrency': 8},
+    },
+}
+
+# Prometheus metrics at /metrics (see backend/metrics.py) and the rate limiter
+# counters at /health/rate-limits/. When set, both require
+# 'Authorization: Bearer <METRICS_TOKEN>'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# SQL query accounting per request (see backend/querybudget.py), keyed by URL name.
+# Budgets give the most queries and database milliseconds a request may use;
+# ROUTES entries override DEFAULT. MODE 'warn' logs, 'raise' fails the request
+# (set QUERY_BUDGET_MODE=raise in CI so N+1 regressions fail the tests).
+QUERY_BUDGET = {
+    'ENABLED': os.getenv('QUERY_BUDGET_ENABLED', 'True') == 'True',
+    'MODE': os.getenv('QUERY_BUDGET_MODE', 'warn'),
+    # Repeated statement shapes listed when a budget is exceeded
+    'TOP_FINGERPRINTS': 5,
+    'DEFAULT': {'queries': 30, 'db_ms': 500},
+    'ROUTES': {
+        'restaurant-detail': {'queries': 8},
+        'restaurant-detail-async': {'queries': 8},
+        'restaurant-page': {'queries': 8},
+        'restaurant-cards': {'queries': 2},
+        'restaurant-time-slots': {'queries': 5},
+        'restaurant-time-slots-batch': {'queries': 4},
+        # Measured on the longest paths - a retry taking over an abandoned
+        # idempotency key, a cancel that promotes the waitlist, the day's first
+        # rollup rows - counting the BEGINs and savepoints SQLite and test
+        # transactions add (bookings.tests.BookingQueryBudgetTests)
+        'create-booking': {'queries': 21},
+        'create-booking-async': {'queries': 21},
+        'cancel-booking': {'queries': 27},
+        'cancel-booking-async': {'queries': 27},
+        # Bulk operations scale with the batch, not the number of rows
+        'booking-slot-batch': {'queries': 12},
+        'admin-bulk-moderation': {'queries': 20},
+        # Streamed exports run their queries after the headers are sent
+        'export': {'queries': None, 'db_ms': None},
+    },
+}
+
+# Short-lived in-process cache for requests that need the full user row
+USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))  # seconds
+USER_CACHE_MAX_SIZE = int(os.getenv('USER_CACHE_MAX_SIZE', 10000))
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -144,16 +238,24 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.health.HealthCheckMiddleware',
+    'backend.metrics.MetricsMiddleware',
+    'backend.querybudget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'backend.ratelimit.RateLimitMiddleware',
+    'backend.db_router.ReplicaRoutingMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Answered by HealthCheckMiddleware before any other middleware or the database
+HEALTH_CHECK_PATH = '/health/'
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -186,9 +288,72 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        # Keep each thread's connection open between requests instead of
+        # reconnecting every time (0 closes it after each request)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),  # seconds
+        # Check a reused connection before the first query of each request,
+        # so one dropped by the server or a failover is replaced transparently
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
     }
 }
 
+# Optional native connection pool for ASGI deployments, where requests do not
+# map to long-lived threads. Requires psycopg 3 (pip install "psycopg[binary,pool]"),
+# which Django then uses instead of psycopg2. A pool replaces persistent
+# connections, so CONN_MAX_AGE is forced to 0.
+#
+# Sizing: every Postgres connection comes from one of
+#   persistent: instances x processes per instance x threads per process
+#   pooled:     instances x processes per instance x DB_POOL_MAX_SIZE
+# plus BACKGROUND_THREAD_WORKERS per process while background jobs run, and
+# ASYNC_DATABASE_THREADS per process when serving async views under ASGI.
+# Keep the total at the auto-scaling group's maximum size below Postgres
+# max_connections minus superuser_reserved_connections and headroom for
+# migrations, cron commands and admin sessions.
+if os.getenv('DB_POOL', 'False') == 'True':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            # Seconds a request waits for a free connection before failing
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        },
+    }
+
+# Read replicas, e.g. DB_REPLICA_HOSTS=replica-1.internal,replica-2.internal
+# They share the primary's name and credentials unless DB_REPLICA_NAME etc. are set.
+# In tests each replica mirrors the primary.
+for index, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.getenv('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': host.strip(),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['backend.db_router.ReplicaRouter']
+
+# URL names whose GET requests read from a replica when one is configured
+DATABASE_REPLICA_ROUTES = [
+    'restaurant-search',
+    'restaurant-detail',
+    'restaurant-detail-async',
+    'restaurant-page',
+    'restaurant-cards',
+    'hot-restaurants',
+    'restaurant-reviews',
+    'restaurant-reviews-async',
+    'manager-analytics',
+    'admin-dashboard',
+    'admin-analytics-timeseries',
+]
+# After a successful write a user reads from the primary for this long
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', 10))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -252,6 +417,7 @@ CORS_ALLOW_HEADERS = [
     "content-type",
     "contenttype",
     "dnt",
+    "idempotency-key",
     "origin",
     "user-agent",
     "x-csrftoken",
@@ -273,4 +439,47 @@ EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
-EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
\ No newline at end of file
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
+
+# Caching
+# Defaults to a per-process memory cache; point CACHE_BACKEND/CACHE_LOCATION at Redis to share it
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Analytics responses: ranges still receiving data expire quickly, closed ranges are kept for a day
+# unless a cancellation or restaurant change bumps the global restaurant version first
+ANALYTICS_CACHE_TTL_OPEN = int(os.getenv('ANALYTICS_CACHE_TTL_OPEN', 60))  # seconds
+ANALYTICS_CACHE_TTL_CLOSED = int(os.getenv('ANALYTICS_CACHE_TTL_CLOSED', 60 * 60 * 24))  # seconds
+# Cached restaurant page parts are also invalidated by version on every change
+RESTAURANT_PAGE_CACHE_TTL = int(os.getenv('RESTAURANT_PAGE_CACHE_TTL', 60 * 10))  # seconds
+RESTAURANT_CARD_CACHE_TTL = int(os.getenv('RESTAURANT_CARD_CACHE_TTL', 60 * 10))  # seconds
+
+# Background work
+# Threads handle I/O-bound side effects, processes handle CPU-bound jobs such as image resizing
+BACKGROUND_THREAD_WORKERS = int(os.getenv('BACKGROUND_THREAD_WORKERS', 4))
+BACKGROUND_PROCESS_WORKERS = int(os.getenv('BACKGROUND_PROCESS_WORKERS', 2))
+# Threads, each with its own database connection, that async views run queries on
+ASYNC_DATABASE_THREADS = int(os.getenv('ASYNC_DATABASE_THREADS', 8))
+
+# Removed restaurants are purged in batches of this many rows, pausing between batches
+RESTAURANT_PURGE_CHUNK_SIZE = int(os.getenv('RESTAURANT_PURGE_CHUNK_SIZE', 1000))
+RESTAURANT_PURGE_CHUNK_PAUSE = float(os.getenv('RESTAURANT_PURGE_CHUNK_PAUSE', 0.05))  # seconds
+# How long the removal status keeps reporting a finished purge as 'done'
+RESTAURANT_PURGE_DONE_TTL = int(os.getenv('RESTAURANT_PURGE_DONE_TTL', 3600))  # seconds
+
+# Tables held for a customer during checkout are released after this long
+SLOT_HOLD_TTL_SECONDS = int(os.getenv('SLOT_HOLD_TTL_SECONDS', 300))
+SLOT_HOLD_MAX_PER_CUSTOMER = int(os.getenv('SLOT_HOLD_MAX_PER_CUSTOMER', 2))
+SLOT_HOLD_SWEEP_BATCH = int(os.getenv('SLOT_HOLD_SWEEP_BATCH', 500))
+
+# Responses to requests sent with an Idempotency-Key header are replayed for this long
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_KEY_TTL_SECONDS', 86400))
+IDEMPOTENCY_KEY_SWEEP_BATCH = int(os.getenv('IDEMPOTENCY_KEY_SWEEP_BATCH', 1000))
+# A claimed key still without a response after this long was abandoned by a
+# worker that died mid-request; retries may claim it again. Keep it above the
+# gunicorn timeout so a slow request is never run twice.
+IDEMPOTENCY_IN_PROGRESS_TIMEOUT = int(os.getenv('IDEMPOTENCY_IN_PROGRESS_TIMEOUT', 60))  # seconds
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import ResolverMatch
+
+from .db_router import ReplicaRouter, ReplicaRoutingMiddleware
+
+REPLICAS = ['replica_0', 'replica_1', 'replica_2']
+
+
+@override_settings(DATABASE_REPLICA_ROUTES=['restaurant-detail'], DATABASE_REPLICA_STICKY_SECONDS=0)
+@mock.patch('backend.db_router.replica_aliases', lambda: REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def serve(self, url_name, method='get', write=False):
+        """
+        Run a request through the middleware and return where each of its reads went
+        """
+        request = getattr(RequestFactory(), method)('/')
+        request.resolver_match = ResolverMatch(lambda request: None, (), {}, url_name=url_name)
+        reads = []
+
+        def view(request):
+            middleware.process_view(request, None, (), {})
+            reads.extend(self.router.db_for_read(None) for _ in range(10))
+            if write:
+                self.router.db_for_write(None)
+                reads.append(self.router.db_for_read(None))
+            return mock.Mock(status_code=200)
+
+        middleware = ReplicaRoutingMiddleware(view)
+        middleware(request)
+        return reads
+
+    def test_every_read_of_a_request_uses_one_replica(self):
+        for _ in range(20):
+            reads = self.serve('restaurant-detail')
+            self.assertEqual(len(set(reads)), 1)
+            self.assertIn(reads[0], REPLICAS)
+
+    def test_each_request_picks_a_replica(self):
+        with mock.patch('backend.db_router.random.choice', side_effect=['replica_1', 'replica_2']):
+            self.assertEqual(set(self.serve('restaurant-detail')), {'replica_1'})
+            self.assertEqual(set(self.serve('restaurant-detail')), {'replica_2'})
+
+    def test_other_routes_and_methods_read_from_the_primary(self):
+        self.assertEqual(set(self.serve('create-booking')), {None})
+        self.assertEqual(set(self.serve('restaurant-detail', method='post')), {None})
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        reads = self.serve('restaurant-detail', write=True)
+        self.assertIn(reads[0], REPLICAS)
+        self.assertIsNone(reads[-1])
+
+    def test_replica_is_not_kept_after_the_request(self):
+        self.serve('restaurant-detail')
+        self.assertIsNone(self.router.db_for_read(None))
@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import health_check
+from .views import health_check, metrics, rate_limit_stats
 
 urlpatterns = [
     path('health/', health_check, name='health_check'),
+    path('health/rate-limits/', rate_limit_stats, name='rate_limit_stats'),
+    path('metrics', metrics, name='metrics'),
     path('admin/', admin.site.urls),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -1,5 +1,12 @@
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from functools import wraps
+from prometheus_client import CONTENT_TYPE_LATEST
+from .metrics import render as render_metrics
+from .ratelimit import stats as rate_limit_counters
+import hmac
 import logging
+import os
 
 # Get an instance of a logger
 logger = logging.getLogger('django')
@@ -7,9 +14,42 @@ logger = logging.getLogger('django')
 def health_check(request):
     """
     Simple health check endpoint that returns a 200 OK response.
+
+    HealthCheckMiddleware normally answers this path first; the view serves
+    it when the middleware is not installed.
     """
     logger.info('Health check endpoint called')
     return JsonResponse({
         'status': 'healthy',
         'message': 'Service is running'
-    }) 
\ No newline at end of file
+    }) 
+
+def metrics_token_required(view):
+    """
+    Require 'Authorization: Bearer <METRICS_TOKEN>' when METRICS_TOKEN is set
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if settings.METRICS_TOKEN:
+            expected = f"Bearer {settings.METRICS_TOKEN}"
+            if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), expected):
+                return JsonResponse({'error': 'Invalid metrics token'}, status=403)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+@metrics_token_required
+def rate_limit_stats(request):
+    """
+    Rate limiter counters for this worker process, used to tune the limits.
+    """
+    return JsonResponse({
+        'process': os.getpid(),
+        'rules': rate_limit_counters.snapshot()
+    })
+
+@metrics_token_required
+def metrics(request):
+    """
+    Prometheus scrape endpoint, aggregated across worker processes.
+    """
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,103 @@
+"""
+Measure how many concurrent requests one worker serves for an I/O-bound read.
+
+Fires ``--concurrency`` simultaneous requests for a restaurant's detail page
+at one worker, in three modes:
+
+* wsgi-threads - the DRF view on a thread pool of ``--threads`` threads,
+                 the way a threaded WSGI worker serves it
+* asgi-sync    - the DRF view under ASGI, run in Django's sync thread
+* asgi-async   - the async variant under ASGI, with its queries on the
+                 ASYNC_DATABASE_THREADS pool
+
+``--db-latency`` adds a sleep to every query to stand in for the network
+round trip to a remote database. Sync views under ASGI all share one thread,
+so their waits queue up; the async variant overlaps them across the pool.
+Compare ``--threads`` with ASYNC_DATABASE_THREADS for a like-for-like run.
+
+Usage, from the backend directory:
+
+    python benchmarks/async_concurrency.py --concurrency 50 --db-latency 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django
+
+django.setup()
+
+from django.db.backends import utils as db_utils
+from django.test import AsyncClient, Client
+
+from restaurants.models import Restaurant
+
+
+def add_db_latency(seconds):
+    """
+    Sleep before every query, as a remote database would
+    """
+    if not seconds:
+        return
+    execute = db_utils.CursorWrapper.execute
+
+    def slow_execute(self, *args, **kwargs):
+        time.sleep(seconds)
+        return execute(self, *args, **kwargs)
+
+    db_utils.CursorWrapper.execute = slow_execute
+
+
+def run_wsgi_threads(url, concurrency, threads):
+    def fetch(_):
+        return Client().get(url).status_code
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(fetch, range(concurrency)))
+
+
+async def run_asgi(url, concurrency):
+    client = AsyncClient()
+    responses = await asyncio.gather(*(client.get(url) for _ in range(concurrency)))
+    return [response.status_code for response in responses]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=50, help='Simultaneous requests per mode')
+    parser.add_argument('--threads', type=int, default=4, help='Threads of the WSGI worker')
+    parser.add_argument('--db-latency', type=float, default=20, help='Milliseconds added to every query')
+    parser.add_argument('--restaurant', type=int, help='Restaurant id (default: first approved)')
+    args = parser.parse_args()
+
+    restaurant_id = args.restaurant or Restaurant.objects.filter(approved=True).values_list('restaurant_id', flat=True).first()
+    if restaurant_id is None:
+        sys.exit('No approved restaurant to request')
+    add_db_latency(args.db_latency / 1000)
+
+    modes = [
+        ('wsgi-threads', lambda: run_wsgi_threads(f'/api/restaurants/{restaurant_id}/', args.concurrency, args.threads)),
+        ('asgi-sync', lambda: asyncio.run(run_asgi(f'/api/restaurants/{restaurant_id}/', args.concurrency))),
+        ('asgi-async', lambda: asyncio.run(run_asgi(f'/api/restaurants/async/{restaurant_id}/', args.concurrency))),
+    ]
+
+    print(f"{args.concurrency} concurrent requests, {args.db_latency:g} ms per query, {args.threads} WSGI threads")
+    print(f"{'mode':<14}{'ok':>6}{'wall ms':>10}{'req/s':>10}")
+    for name, run in modes:
+        start = time.perf_counter()
+        statuses = run()
+        elapsed = time.perf_counter() - start
+        ok = sum(1 for status in statuses if status == 200)
+        print(f"{name:<14}{ok:>6}{elapsed * 1000:>10.1f}{len(statuses) / elapsed:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Measure the per-request cost of opening database connections.
+
+Replays the request lifecycle Django runs around every view (request_started,
+one trivial query, request_finished) against the configured database in
+three modes:
+
+* fresh      - CONN_MAX_AGE = 0, a new connection for every request
+* persistent - CONN_MAX_AGE > 0 with health checks, one connection reused
+* pooled     - psycopg 3 native pool (skipped unless psycopg_pool is installed)
+
+Usage, from the backend directory:
+
+    python benchmarks/db_connections.py --requests 500
+
+Point it at the real database (DB_HOST etc.) to see the network handshake,
+TLS and authentication cost that persistent connections avoid.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django
+
+django.setup()
+
+from django.core import signals
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+
+def configure(mode, max_age):
+    """
+    Switch the default connection to a mode. Takes effect on the next connect.
+    """
+    connection.close()
+    options = dict(connection.settings_dict.get('OPTIONS', {}))
+    options.pop('pool', None)
+    if mode == 'fresh':
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = False
+    elif mode == 'persistent':
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = True
+    elif mode == 'pooled':
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = False
+        options['pool'] = {'min_size': 1, 'max_size': 2}
+    connection.settings_dict['OPTIONS'] = options
+
+
+def pool_available():
+    if connection.vendor != 'postgresql':
+        return False
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run(requests):
+    """
+    Replay ``requests`` request cycles. Returns (latencies in ms, connects)
+    """
+    connects = []
+    connection_created.connect(lambda **kwargs: connects.append(1), weak=False, dispatch_uid='benchmark')
+    latencies = []
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            signals.request_started.send(sender=None)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            signals.request_finished.send(sender=None)
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        connection_created.disconnect(dispatch_uid='benchmark')
+        connection.close()
+    return latencies, len(connects)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='Request cycles per mode')
+    parser.add_argument('--max-age', type=int, default=60, help='CONN_MAX_AGE for the persistent mode')
+    args = parser.parse_args()
+
+    modes = ['fresh', 'persistent']
+    if pool_available():
+        modes.append('pooled')
+    else:
+        print('pooled: skipped (needs PostgreSQL and psycopg[pool])')
+
+    print(f"{connection.vendor} database, {args.requests} requests per mode")
+    print(f"{'mode':<12}{'connects':>10}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for mode in modes:
+        configure(mode, args.max_age)
+        run(min(20, args.requests))  # warm up
+        latencies, connects = run(args.requests)
+        print(
+            f"{mode:<12}{connects:>10}{statistics.mean(latencies):>10.3f}"
+            f"{percentile(latencies, 0.5):>10.3f}{percentile(latencies, 0.99):>10.3f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
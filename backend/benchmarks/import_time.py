@@ -0,0 +1,108 @@
+"""
+Profile app import time and time to first request on a fresh worker.
+
+Each run starts a new interpreter with ``-X importtime``, loads the app the
+way a worker does (settings, apps, the WSGI handler and the URLconf), then
+answers one request to ``--path``. Reports the slowest imports and the time
+from interpreter start to the first response, and fails if:
+
+* the median time to first request is above ``--target-ms``, or
+* a module that should load on first use (DEFERRED) was imported at startup.
+
+Usage, from the backend directory:
+
+    python benchmarks/import_time.py --runs 5 --target-ms 1000
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Imported on first use only; loading them at startup is a regression
+DEFERRED = ('boto3', 'botocore', 'PIL', 'smtplib')
+
+WORKER = """
+import os, sys
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns
+status = Client().get(sys.argv[1]).status_code
+print(f'status={status}', file=sys.stderr)
+"""
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def profile(path):
+    """
+    Run one fresh worker. Returns (wall ms, status, {module: (self us, cumulative us, depth)})
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', WORKER, path],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    wall = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+
+    modules = {}
+    status = None
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+        elif line.startswith('status='):
+            status = int(line[len('status='):])
+    return wall, status, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh workers to start')
+    parser.add_argument('--path', default='/health/', help='Endpoint for the first request')
+    parser.add_argument('--target-ms', type=float, default=1000, help='Budget for time to first request')
+    parser.add_argument('--top', type=int, default=15, help='Slowest top-level imports to list')
+    args = parser.parse_args()
+
+    runs = [profile(args.path) for _ in range(args.runs)]
+    walls = [wall for wall, _, _ in runs]
+    _, status, modules = runs[-1]
+
+    print("Slowest top-level imports (last run, cumulative ms)")
+    top_level = sorted(
+        ((cumulative, name) for name, (_, cumulative, depth) in modules.items() if depth == 1),
+        reverse=True
+    )
+    for cumulative, name in top_level[:args.top]:
+        print(f"  {cumulative / 1000:>8.1f}  {name}")
+    total = sum(cumulative for cumulative, _ in top_level) / 1000
+    print(f"Imports: {total:.0f} ms across {len(modules)} modules")
+
+    median = statistics.median(walls)
+    print(f"Time to first request ({args.path} -> {status}): median {median:.0f} ms, "
+          f"min {min(walls):.0f} ms over {args.runs} runs (target {args.target_ms:.0f} ms)")
+
+    failures = []
+    loaded = [name for name in DEFERRED if name in modules]
+    if loaded:
+        failures.append(f"deferred modules imported at startup: {', '.join(loaded)}")
+    if median > args.target_ms:
+        failures.append(f"time to first request {median:.0f} ms is over the {args.target_ms:.0f} ms target")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
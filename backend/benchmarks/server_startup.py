@@ -0,0 +1,113 @@
+"""
+Measure server startup time and warm request latency.
+
+Starts the app the way it is served, waits for the health check to answer,
+then times the first request to ``--path`` and ``--requests`` more over one
+keep-alive connection. Servers:
+
+* runserver       - Django's development server
+* gunicorn        - gunicorn.conf.py as deployed (preloaded app, gthread)
+* gunicorn-lazy   - the same with GUNICORN_PRELOAD=False, each worker
+                    importing the app itself
+* gunicorn-asgi   - the opt-in uvicorn worker serving the ASGI app
+
+Usage, from the backend directory:
+
+    python benchmarks/server_startup.py --workers 2 --requests 200
+
+The database settings come from the environment as usual; point --path at
+an endpoint that does not need authentication.
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'runserver': ([sys.executable, 'manage.py', 'runserver', '--noreload', '127.0.0.1:{port}'], {}),
+    'gunicorn': (['gunicorn', '-c', 'gunicorn.conf.py'], {}),
+    'gunicorn-lazy': (['gunicorn', '-c', 'gunicorn.conf.py'], {'GUNICORN_PRELOAD': 'False'}),
+    'gunicorn-asgi': (['gunicorn', '-c', 'gunicorn.conf.py'], {'GUNICORN_WORKER_CLASS': 'uvicorn.workers.UvicornWorker'}),
+}
+
+
+def wait_until_healthy(port, process, deadline):
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health/')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.02)
+    raise RuntimeError('server did not become healthy in time')
+
+
+def timed_get(connection, path):
+    start = time.perf_counter()
+    connection.request('GET', path)
+    response = connection.getresponse()
+    response.read()
+    return (time.perf_counter() - start) * 1000, response.status
+
+
+def measure(name, port, workers, path, requests):
+    command, env = SERVERS[name]
+    env = {**os.environ, **env, 'PORT': str(port), 'WEB_CONCURRENCY': str(workers)}
+    command = [part.format(port=port) for part in command]
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_healthy(port, process, start + 60)
+        startup = (time.perf_counter() - start) * 1000
+
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        first, status = timed_get(connection, path)
+        latencies = [timed_get(connection, path)[0] for _ in range(requests)]
+        connection.close()
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+    return {
+        'startup': startup,
+        'status': status,
+        'first': first,
+        'p50': statistics.median(latencies),
+        'p99': sorted(latencies)[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--servers', nargs='+', choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument('--workers', type=int, default=2, help='WEB_CONCURRENCY for gunicorn')
+    parser.add_argument('--path', default='/api/restaurants/', help='Endpoint to time')
+    parser.add_argument('--requests', type=int, default=200, help='Warm requests per server')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"GET {args.path}, {args.requests} warm requests, {args.workers} gunicorn workers")
+    print(f"{'server':<16}{'startup ms':>12}{'status':>8}{'first ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name in args.servers:
+        result = measure(name, args.port, args.workers, args.path, args.requests)
+        print(
+            f"{name:<16}{result['startup']:>12.0f}{result['status']:>8}{result['first']:>10.2f}"
+            f"{result['p50']:>10.2f}{result['p99']:>10.2f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Async variants of the reviews list and the booking flow.
+
+Queries run on the database thread pool, so concurrent requests overlap
+their database waits. Booking and cancelling share their transactional core
+with the DRF views through ``bookings.reservations`` and honour the same
+Idempotency-Key header; the confirmation email goes to the bounded
+background pool instead of holding the request.
+"""
+
+import logging
+
+from backend.asyncapi import async_api_view, error_response, json_response, read_json
+from backend.background import run_in_background, run_in_database_thread
+from users.authentication import get_cached_user
+from .idempotency import async_idempotent
+from .models import Booking, BookingSlot, Review
+from .reservations import BookingError, cancel_booking, reserve_table
+from .serializers import BookingSerializer, ReviewSerializer
+from .utils import send_booking_confirmation_email
+
+logger = logging.getLogger('bookings')
+
+
+@async_api_view()
+async def restaurant_reviews_async(request, restaurant_id):
+    """
+    Async counterpart of RestaurantReviewsView
+    """
+    def load():
+        reviews = (
+            Review.objects
+            .filter(restaurant_id=restaurant_id)
+            .select_related('customer_id', 'restaurant_id')
+            .order_by('-created_at')
+        )
+        return ReviewSerializer(reviews, many=True).data
+
+    return json_response(await run_in_database_thread(load))
+
+
+@async_api_view(methods=('POST',), authenticated=True)
+@async_idempotent
+async def create_booking_async(request):
+    """
+    Async counterpart of CreateBookingView
+    """
+    logger.info(f"Creating booking for user: {request.user.username}")
+    data = read_json(request)
+    if data is None:
+        return error_response('Request body must be a JSON object', 400)
+    try:
+        slot_id = int(data.get('slot_id'))
+        number_of_people = int(data.get('number_of_people'))
+    except (TypeError, ValueError):
+        return error_response('slot_id and number_of_people must be integers', 400)
+
+    # Get the slot
+    slot = await run_in_database_thread(
+        BookingSlot.objects
+        .select_related('restaurant_id')
+        .filter(slot_id=slot_id, restaurant_id__deleted_at__isnull=True, restaurant_id__approved=True)
+        .first
+    )
+    if slot is None:
+        logger.error(f"Booking slot not found: {slot_id}")
+        return error_response('Booking slot not found', 404)
+
+    # Check if the number of people is appropriate for the table size
+    if number_of_people > slot.table_size:
+        logger.warning(f"Table size mismatch: requested {number_of_people} people for table size {slot.table_size}")
+        return error_response(f'This table can only accommodate up to {slot.table_size} people', 400)
+
+    try:
+        booking = await run_in_database_thread(reserve_table, request.user, slot, number_of_people)
+    except BookingError as e:
+        logger.warning(f"Slot {slot_id} is fully booked")
+        return error_response(str(e), e.status, **e.extra)
+    logger.info(f"Booking created successfully: {booking.booking_id} for user {request.user.username}")
+
+    # Send confirmation email from the background pool
+    customer = await run_in_database_thread(get_cached_user, request.user.pk)
+    run_in_background(
+        send_booking_confirmation_email,
+        user_email=customer.email,
+        user_name=request.user.username,
+        booking_details={
+            'restaurant_name': slot.restaurant_id.name,
+            'booking_date': slot.slot_datetime.strftime('%Y-%m-%d'),
+            'booking_time': slot.slot_datetime.strftime('%I:%M %p'),
+            'number_of_people': number_of_people,
+            'booking_id': booking.booking_id
+        }
+    )
+
+    return json_response(BookingSerializer(booking).data, status=201)
+
+
+@async_api_view(methods=('POST',), authenticated=True)
+@async_idempotent
+async def cancel_booking_async(request, booking_id):
+    """
+    Async counterpart of CancelBookingView
+    """
+    booking = await run_in_database_thread(
+        Booking.objects
+        .select_related('slot_id__restaurant_id')
+        .filter(booking_id=booking_id, customer_id=request.user)
+        .first
+    )
+    if booking is None:
+        return error_response('Booking not found', 404)
+    if booking.status == 'Cancelled':
+        return error_response('Booking is already cancelled', 400)
+
+    try:
+        booking = await run_in_database_thread(cancel_booking, booking)
+    except BookingError as e:
+        return error_response(str(e), e.status)
+    return json_response(BookingSerializer(booking).data)
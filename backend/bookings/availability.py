@@ -0,0 +1,80 @@
+"""
+Shared queries for how many tables of a slot are taken.
+
+A table is taken by a 'Booked' booking or by an unexpired SlotHold.
+"""
+
+from collections import Counter
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Booking, BookingSlot, SlotHold
+
+
+def booked_tables_by_slot(slot_ids):
+    """
+    Return {slot_id: number of 'Booked' bookings} for many slots in one query.
+    Slots without bookings are absent from the result.
+    """
+    return dict(
+        Booking.objects.filter(slot_id__in=slot_ids, status='Booked')
+        .values_list('slot_id')
+        .annotate(booked=Count('booking_id'))
+        .order_by()
+    )
+
+
+def held_tables_by_slot(slot_ids, exclude_customer=None):
+    """
+    Return {slot_id: number of unexpired holds} for many slots in one query.
+    Holds placed by ``exclude_customer`` are not counted, so a customer's own
+    hold never hides a slot from them.
+    """
+    holds = SlotHold.objects.filter(slot_id__in=slot_ids, expires_at__gt=timezone.now())
+    if exclude_customer is not None:
+        holds = holds.exclude(customer_id=exclude_customer)
+    return dict(
+        holds.values_list('slot_id')
+        .annotate(held=Count('hold_id'))
+        .order_by()
+    )
+
+
+def taken_tables_by_slot(slot_ids, exclude_customer=None):
+    """
+    Return {slot_id: booked + held tables} for many slots in two queries
+    """
+    slot_ids = list(slot_ids)
+    taken = Counter(booked_tables_by_slot(slot_ids))
+    taken.update(held_tables_by_slot(slot_ids, exclude_customer))
+    return dict(taken)
+
+
+def open_slots(restaurant_ids, start, end, num_people, exclude_customer=None):
+    """
+    Return every slot of the given restaurants between start and end
+    (inclusive) that fits the party and still has a free table, ordered by
+    restaurant and time and annotated with ``booked`` and ``held`` tables.
+
+    Booked and held tables are counted in the same grouped query, and full
+    slots are dropped by its HAVING clause, so the cost follows the number of
+    slots in the window rather than the number of restaurants.
+    """
+    active_holds = Q(slothold__expires_at__gt=timezone.now())
+    if exclude_customer is not None:
+        active_holds &= ~Q(slothold__customer_id=exclude_customer)
+    return (
+        BookingSlot.objects
+        .filter(
+            restaurant_id__in=restaurant_ids,
+            slot_datetime__range=(start, end),
+            table_size__gte=num_people
+        )
+        .annotate(
+            booked=Count('booking', filter=Q(booking__status='Booked'), distinct=True),
+            held=Count('slothold', filter=active_holds, distinct=True)
+        )
+        .filter(total_tables__gt=F('booked') + F('held'))
+        .order_by('restaurant_id', 'slot_datetime', 'slot_id')
+    )
@@ -0,0 +1,131 @@
+"""
+Streaming CSV / NDJSON exports of bookings, slots and reviews.
+
+Rows are read with ``.iterator(chunk_size=...)`` (a server-side cursor on
+PostgreSQL) as flat ``values_list`` tuples and encoded in batches, so memory
+stays constant however many rows are exported.
+"""
+
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Booking, BookingSlot, Review
+
+# Rows fetched per round-trip from the server-side cursor
+CHUNK_SIZE = 2000
+
+# Dataset name -> how to query it. Columns are (header, ORM lookup) pairs.
+DATASETS = {
+    'bookings': {
+        'model': Booking,
+        'restaurant_field': 'slot_id__restaurant_id',
+        'date_field': 'slot_id__slot_datetime',
+        'order_by': 'booking_id',
+        'columns': [
+            ('booking_id', 'booking_id'),
+            ('restaurant_id', 'slot_id__restaurant_id'),
+            ('restaurant_name', 'slot_id__restaurant_id__name'),
+            ('slot_id', 'slot_id'),
+            ('slot_datetime', 'slot_id__slot_datetime'),
+            ('customer_id', 'customer_id'),
+            ('customer_name', 'customer_id__username'),
+            ('number_of_people', 'number_of_people'),
+            ('status', 'status'),
+            ('booking_datetime', 'booking_datetime'),
+        ],
+    },
+    'slots': {
+        'model': BookingSlot,
+        'restaurant_field': 'restaurant_id',
+        'date_field': 'slot_datetime',
+        'order_by': 'slot_id',
+        'columns': [
+            ('slot_id', 'slot_id'),
+            ('restaurant_id', 'restaurant_id'),
+            ('restaurant_name', 'restaurant_id__name'),
+            ('slot_datetime', 'slot_datetime'),
+            ('table_size', 'table_size'),
+            ('total_tables', 'total_tables'),
+        ],
+    },
+    'reviews': {
+        'model': Review,
+        'restaurant_field': 'restaurant_id',
+        'date_field': 'created_at',
+        'order_by': 'review_id',
+        'columns': [
+            ('review_id', 'review_id'),
+            ('restaurant_id', 'restaurant_id'),
+            ('restaurant_name', 'restaurant_id__name'),
+            ('customer_id', 'customer_id'),
+            ('customer_name', 'customer_id__username'),
+            ('rating', 'rating'),
+            ('comment', 'comment'),
+            ('created_at', 'created_at'),
+        ],
+    },
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_queryset(dataset, start_date=None, end_date=None, restaurant_ids=None, manager=None):
+    """
+    Build the flat values_list queryset for a dataset and its filters
+    """
+    config = DATASETS[dataset]
+    queryset = config['model'].objects.all()
+    if start_date:
+        queryset = queryset.filter(**{f"{config['date_field']}__date__gte": start_date})
+    if end_date:
+        queryset = queryset.filter(**{f"{config['date_field']}__date__lte": end_date})
+    if restaurant_ids:
+        queryset = queryset.filter(**{f"{config['restaurant_field']}__in": restaurant_ids})
+    if manager is not None:
+        queryset = queryset.filter(**{f"{config['restaurant_field']}__manager_id": manager})
+    return queryset.order_by(config['order_by']).values_list(*[lookup for _, lookup in config['columns']])
+
+
+class Echo:
+    """
+    File-like object whose write() returns the line instead of buffering it
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(dataset, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _ in DATASETS[dataset]['columns']])
+    batch = []
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        batch.append(writer.writerow(row))
+        if len(batch) >= CHUNK_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream_ndjson(dataset, rows):
+    headers = [header for header, _ in DATASETS[dataset]['columns']]
+    encoder = DjangoJSONEncoder()
+    batch = []
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        batch.append(encoder.encode(dict(zip(headers, row))) + '\n')
+        if len(batch) >= CHUNK_SIZE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
@@ -0,0 +1,96 @@
+"""
+Temporary holds on booking slots during checkout.
+
+Placing a hold locks the slot row, so two customers can never hold or book
+the last table at the same time. Expiry needs no timer: availability only
+counts holds whose ``expires_at`` is in the future, and ``sweep_expired_holds``
+deletes stale rows in index order, a batch at a time.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import taken_tables_by_slot
+from .models import BookingSlot, SlotHold
+
+
+class HoldError(Exception):
+    """
+    A hold could not be placed. ``status`` is the HTTP status to answer with.
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def place_hold(customer, slot_id, number_of_people):
+    """
+    Reserve one table of a slot for the customer, or refresh their existing
+    hold on it. Returns the SlotHold.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.SLOT_HOLD_TTL_SECONDS)
+    with transaction.atomic():
+        try:
+            slot = BookingSlot.objects.select_for_update().get(
+                slot_id=slot_id,
+                restaurant_id__deleted_at__isnull=True,
+                restaurant_id__approved=True
+            )
+        except BookingSlot.DoesNotExist:
+            raise HoldError('Booking slot not found', status=404)
+
+        if slot.slot_datetime <= now:
+            raise HoldError('This slot has already started')
+        if number_of_people > slot.table_size:
+            raise HoldError(f'This table can only accommodate up to {slot.table_size} people')
+
+        active = SlotHold.objects.filter(customer_id=customer, expires_at__gt=now)
+        existing = active.filter(slot_id=slot).first()
+        if existing is not None:
+            existing.number_of_people = number_of_people
+            existing.expires_at = expires_at
+            existing.save(update_fields=['number_of_people', 'expires_at'])
+            return existing
+
+        if active.count() >= settings.SLOT_HOLD_MAX_PER_CUSTOMER:
+            raise HoldError('You already hold the maximum number of tables', status=409)
+
+        taken = taken_tables_by_slot([slot.slot_id]).get(slot.slot_id, 0)
+        if taken >= slot.total_tables:
+            raise HoldError('This slot is fully booked', status=409)
+
+        return SlotHold.objects.create(
+            slot_id=slot,
+            customer_id=customer,
+            number_of_people=number_of_people,
+            expires_at=expires_at
+        )
+
+
+def release_hold(customer, hold_id):
+    """
+    Give a held table back. Returns False if there was no such hold.
+    """
+    deleted, _ = SlotHold.objects.filter(hold_id=hold_id, customer_id=customer).delete()
+    return bool(deleted)
+
+
+def sweep_expired_holds(batch_size=None):
+    """
+    Delete one batch of expired holds, oldest first. Returns the number deleted.
+    """
+    batch_size = batch_size or settings.SLOT_HOLD_SWEEP_BATCH
+    expired_ids = list(
+        SlotHold.objects.filter(expires_at__lte=timezone.now())
+        .order_by('expires_at')
+        .values_list('hold_id', flat=True)[:batch_size]
+    )
+    if not expired_ids:
+        return 0
+    deleted, _ = SlotHold.objects.filter(hold_id__in=expired_ids).delete()
+    return deleted
@@ -0,0 +1,205 @@
+"""
+Idempotency-Key support for unsafe booking and review endpoints.
+
+A client that may retry sends the same ``Idempotency-Key`` header with every
+attempt. The first attempt claims the key by inserting an IdempotencyKey row
+in its own short transaction; the unique constraint makes concurrent
+duplicates fail that insert instead of queueing on the slot row. Duplicates
+then get the stored response replayed, or 409 while the first attempt is
+still running. Responses with a 5xx status are not stored, so the client can
+retry them. A claim still in progress after IDEMPOTENCY_IN_PROGRESS_TIMEOUT
+belongs to a worker that died mid-request, and the next retry takes it over.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from backend.asyncapi import json_response, read_json
+from backend.background import run_in_database_thread
+from .models import IdempotencyKey
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(path, data):
+    """
+    Hash the parsed request body, so a key reused for a different request is caught
+    """
+    body = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{path}\n{body}".encode()).hexdigest()
+
+
+def claim_key(user, endpoint, key, request_hash):
+    """
+    Insert the in-progress row for a key. Returns (row, created); row is None
+    if the key kept changing hands while we looked.
+
+    An expired row for the same key is taken over in place, as if it had been
+    swept, and so is an in-progress row whose lease has run out.
+    """
+    now = timezone.now()
+    lookup = {'user_id': user, 'endpoint': endpoint, 'key': key}
+    claim = {
+        'request_hash': request_hash,
+        'status_code': None,
+        'response_body': None,
+        'created_at': now,
+        'expires_at': now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+    }
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(**lookup, **claim), True
+    except IntegrityError:
+        pass
+
+    for _ in range(2):
+        existing = IdempotencyKey.objects.filter(**lookup).first()
+        if existing is None:
+            # Swept or released between the insert and the read
+            try:
+                with transaction.atomic():
+                    return IdempotencyKey.objects.create(**lookup, **claim), True
+            except IntegrityError:
+                continue
+        stale_before = now - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT)
+        abandoned = existing.status_code is None and existing.created_at <= stale_before
+        if existing.expires_at > now and not abandoned:
+            return existing, False
+        # Conditional, so of several retries only one takes the key over
+        taken = IdempotencyKey.objects.filter(
+            Q(expires_at__lte=now) | Q(status_code__isnull=True, created_at__lte=stale_before),
+            pk=existing.pk
+        ).update(**claim)
+        if taken:
+            for field, value in claim.items():
+                setattr(existing, field, value)
+            return existing, True
+    return None, False
+
+
+def begin_request(user, endpoint, key, request_hash):
+    """
+    Claim a key before running the request. Returns (claim, None) when the
+    request should run, ``claim`` being the queryset of its in-progress row,
+    or (None, (body, status, headers)) to answer with instead.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        return None, ({
+            'error': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters'
+        }, status.HTTP_400_BAD_REQUEST, {})
+
+    record, created = claim_key(user, endpoint, key, request_hash)
+    if created:
+        # By primary key only: if this request outlives its lease, the key
+        # then belongs to the retry that took it over and is left alone
+        return IdempotencyKey.objects.filter(pk=record.pk), None
+
+    if record is not None and record.request_hash != request_hash:
+        return None, ({
+            'error': 'Idempotency-Key was already used for a different request'
+        }, status.HTTP_422_UNPROCESSABLE_ENTITY, {})
+    if record is None or record.status_code is None:
+        return None, ({
+            'error': 'A request with this Idempotency-Key is still being processed'
+        }, status.HTTP_409_CONFLICT, {'Retry-After': '1'})
+    return None, (record.response_body, record.status_code, {'Idempotent-Replayed': 'true'})
+
+
+def finish_request(claim, status_code, body):
+    """
+    Store the response for replay, or release the key after a server error
+    """
+    if status_code >= 500:
+        # Let the client retry server errors with the same key
+        claim.delete()
+    else:
+        claim.update(status_code=status_code, response_body=body)
+
+
+def idempotent(view_method):
+    """
+    Decorate an APIView ``post`` so requests carrying an Idempotency-Key
+    header run at most once per user, endpoint and key
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        claim, answer = begin_request(
+            request.user, request.resolver_match.url_name, key,
+            request_fingerprint(request.path, request.data)
+        )
+        if answer is not None:
+            body, status_code, headers = answer
+            return Response(body, status=status_code, headers=headers)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            claim.delete()
+            raise
+        finish_request(claim, response.status_code, response.data)
+        return response
+
+    return wrapper
+
+
+def async_idempotent(view):
+    """
+    ``idempotent`` for async views decorated with ``async_api_view``
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key:
+            return await view(request, *args, **kwargs)
+
+        claim, answer = await run_in_database_thread(
+            begin_request, request.user, request.resolver_match.url_name, key,
+            request_fingerprint(request.path, read_json(request))
+        )
+        if answer is not None:
+            body, status_code, headers = answer
+            response = json_response(body, status=status_code)
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        try:
+            response = await view(request, *args, **kwargs)
+        except Exception:
+            await run_in_database_thread(claim.delete)
+            raise
+        body = json.loads(response.content) if response.status_code < 500 else None
+        await run_in_database_thread(finish_request, claim, response.status_code, body)
+        return response
+
+    return wrapper
+
+
+def sweep_expired_keys(batch_size=None):
+    """
+    Delete one batch of expired keys, oldest first. Returns the number deleted.
+    """
+    batch_size = batch_size or settings.IDEMPOTENCY_KEY_SWEEP_BATCH
+    expired_ids = list(
+        IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+        .order_by('expires_at')
+        .values_list('idempotency_id', flat=True)[:batch_size]
+    )
+    if not expired_ids:
+        return 0
+    deleted, _ = IdempotencyKey.objects.filter(idempotency_id__in=expired_ids).delete()
+    return deleted
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from bookings.models import Booking
+from bookings.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily booking rollups used by the admin analytics dashboard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD), defaults to the first booking')
+        parser.add_argument('--end', help='Last day to rebuild (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        try:
+            end_date = datetime.strptime(options['end'], '%Y-%m-%d').date() if options['end'] else timezone.now().date()
+            if options['start']:
+                start_date = datetime.strptime(options['start'], '%Y-%m-%d').date()
+            else:
+                first_booking = Booking.objects.aggregate(first=Min('booking_datetime'))['first']
+                start_date = first_booking.date() if first_booking else end_date
+        except ValueError as e:
+            raise CommandError(f'Invalid date format: {str(e)}')
+
+        total = 0
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), end_date)
+            written = rebuild_rollups(chunk_start, chunk_end)
+            total += written
+            self.stdout.write(f"{chunk_start} - {chunk_end}: {written} rollup rows")
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} rollup rows from {start_date} to {end_date}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from bookings.idempotency import sweep_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency keys in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Keys deleted per query')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            deleted = sweep_expired_keys(options['batch_size'])
+            if not deleted:
+                break
+            total += deleted
+        self.stdout.write(self.style.SUCCESS(f'Deleted {total} expired idempotency keys'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from bookings.holds import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Delete expired slot holds in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Holds deleted per query')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            deleted = sweep_expired_holds(options['batch_size'])
+            if not deleted:
+                break
+            total += deleted
+        self.stdout.write(self.style.SUCCESS(f'Deleted {total} expired slot holds'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 01:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_alter_booking_status'),
+        ('restaurants', '0004_restaurantphoto_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookingRollup',
+            fields=[
+                ('rollup_id', models.AutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('Booked', 'Booked'), ('Cancelled', 'Cancelled')], max_length=50)),
+                ('city', models.CharField(blank=True, default='', max_length=100)),
+                ('party_size', models.IntegerField()),
+                ('booking_count', models.IntegerField(default=0)),
+                ('covers', models.IntegerField(default=0)),
+                ('restaurant_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='restaurants.restaurant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='bookings_da_date_00c68c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'restaurant_id', 'status', 'city', 'party_size'), name='unique_daily_booking_rollup')],
+            },
+        ),
+    ]
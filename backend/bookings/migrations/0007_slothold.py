@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-19 01:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_dailybookingrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('hold_id', models.AutoField(primary_key=True, serialize=False)),
+                ('number_of_people', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('customer_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('slot_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bookings.bookingslot')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='bookings_sl_expires_640215_idx'), models.Index(fields=['slot_id', 'expires_at'], name='bookings_sl_slot_id_551c89_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-19 01:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0007_slothold'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('waitlist_id', models.AutoField(primary_key=True, serialize=False)),
+                ('number_of_people', models.IntegerField()),
+                ('status', models.CharField(choices=[('Waiting', 'Waiting'), ('Promoted', 'Promoted'), ('Cancelled', 'Cancelled')], default='Waiting', max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking_id', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='bookings.booking')),
+                ('customer_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('slot_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='bookings.bookingslot')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['slot_id', 'status', 'created_at'], name='bookings_wa_slot_id_3602b5_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'Waiting')), fields=('slot_id', 'customer_id'), name='unique_waiting_entry_per_slot')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_idempotencykey'),
+        ('restaurants', '0005_restaurant_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookingslot',
+            index=models.Index(fields=['restaurant_id', 'slot_datetime'], name='bookings_bo_restaur_b3e0c6_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.6 on 2026-10-19 02:43
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_city_rows(apps, schema_editor):
+    """
+    Fold rows that differed only by city into one row per remaining key
+    """
+    DailyBookingRollup = apps.get_model('bookings', 'DailyBookingRollup')
+    duplicates = (
+        DailyBookingRollup.objects
+        .values('date', 'restaurant_id', 'status', 'party_size')
+        .annotate(rows=Count('rollup_id'), keep=Min('rollup_id'), booking_count=Sum('booking_count'), covers=Sum('covers'))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        key = {field: row[field] for field in ('date', 'restaurant_id', 'status', 'party_size')}
+        DailyBookingRollup.objects.filter(**key).exclude(rollup_id=row['keep']).delete()
+        DailyBookingRollup.objects.filter(rollup_id=row['keep']).update(
+            booking_count=row['booking_count'], covers=row['covers']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_bookingslot_restaurant_datetime_index'),
+        ('restaurants', '0005_restaurant_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='dailybookingrollup',
+            name='unique_daily_booking_rollup',
+        ),
+        migrations.RunPython(merge_city_rows, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='dailybookingrollup',
+            name='city',
+        ),
+        migrations.AddConstraint(
+            model_name='dailybookingrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'restaurant_id', 'status', 'party_size'), name='unique_daily_booking_rollup'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from users.models import User
 from restaurants.models import Restaurant
@@ -9,6 +10,11 @@ class BookingSlot(models.Model):
     table_size = models.IntegerField()
     total_tables = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['restaurant_id', 'slot_datetime']),
+        ]
+
     def __str__(self):
         return f"Slot at {self.restaurant_id.name} - {self.slot_datetime}"
 
@@ -27,6 +33,65 @@ class Booking(models.Model):
     def __str__(self):
         return f"Booking {self.booking_id} by {self.customer_id.username}"
 
+class SlotHold(models.Model):
+    """
+    One table of a slot reserved for a customer while they complete a booking.
+
+    A hold counts against the slot's capacity until ``expires_at``; expired
+    rows are ignored by every availability query and swept in batches
+    along the ``expires_at`` index.
+    """
+    hold_id = models.AutoField(primary_key=True)
+    slot_id = models.ForeignKey(BookingSlot, on_delete=models.CASCADE)
+    customer_id = models.ForeignKey(User, on_delete=models.CASCADE)
+    number_of_people = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at']),
+            models.Index(fields=['slot_id', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"Hold {self.hold_id} on slot {self.slot_id_id} until {self.expires_at}"
+
+class WaitlistEntry(models.Model):
+    """
+    A customer waiting for a table at a full slot.
+
+    When a booking on the slot is cancelled, the oldest waiting entry whose
+    party fits the table is turned into a booking in the same transaction.
+    """
+    STATUSES = (
+        ('Waiting', 'Waiting'),
+        ('Promoted', 'Promoted'),
+        ('Cancelled', 'Cancelled'),
+    )
+    waitlist_id = models.AutoField(primary_key=True)
+    slot_id = models.ForeignKey(BookingSlot, on_delete=models.CASCADE)
+    customer_id = models.ForeignKey(User, on_delete=models.CASCADE)
+    number_of_people = models.IntegerField()
+    status = models.CharField(max_length=50, choices=STATUSES, default='Waiting')
+    created_at = models.DateTimeField(auto_now_add=True)
+    booking_id = models.ForeignKey(Booking, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['slot_id', 'customer_id'],
+                condition=models.Q(status='Waiting'),
+                name='unique_waiting_entry_per_slot'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['slot_id', 'status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Waitlist {self.waitlist_id} for slot {self.slot_id_id} ({self.status})"
+
 class Review(models.Model):
     review_id = models.AutoField(primary_key=True)
     restaurant_id = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
@@ -36,4 +101,68 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Review {self.review_id} for {self.restaurant_id.name}"
\ No newline at end of file
+        return f"Review {self.review_id} for {self.restaurant_id.name}"
+
+class DailyBookingRollup(models.Model):
+    """
+    Bookings made per day, pre-aggregated for the admin analytics dashboard.
+
+    Maintained incrementally by bookings.rollups on every booking and
+    cancellation, and rebuilt by the backfill_booking_rollups command.
+    Restaurant attributes that can change, such as the city, are read through
+    ``restaurant_id`` rather than copied into the row.
+    """
+    rollup_id = models.AutoField(primary_key=True)
+    date = models.DateField()
+    restaurant_id = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
+    status = models.CharField(max_length=50, choices=Booking.STATUSES)
+    party_size = models.IntegerField()
+    booking_count = models.IntegerField(default=0)
+    covers = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'restaurant_id', 'status', 'party_size'],
+                name='unique_daily_booking_rollup'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.restaurant_id_id} {self.status} x{self.party_size}: {self.booking_count}"
+
+class IdempotencyKey(models.Model):
+    """
+    The stored outcome of a request sent with an Idempotency-Key header.
+
+    The row is inserted before the view runs (``status_code`` still null), so
+    the unique constraint lets exactly one of several concurrent duplicates
+    proceed. Once the view answers, its response is kept until ``expires_at``
+    and replayed for retries with the same key.
+    """
+    idempotency_id = models.AutoField(primary_key=True)
+    user_id = models.ForeignKey(User, on_delete=models.CASCADE)
+    endpoint = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.IntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_id', 'endpoint', 'key'],
+                name='unique_idempotency_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key} ({self.status_code or 'in progress'})"
@@ -0,0 +1,102 @@
+"""
+The transactional core of booking and cancelling a table.
+
+Shared by the DRF views and their async variants, which run these functions
+in a worker thread because transactions and row locks are sync-only.
+"""
+
+from django.db import transaction
+
+from backend.metrics import BOOKINGS_CANCELLED, BOOKINGS_CREATED
+from restaurants.cache import invalidate_restaurants
+from .availability import taken_tables_by_slot
+from .models import Booking, BookingSlot, SlotHold
+from .rollups import record_booking, record_cancellation
+from .waitlist import promote_next
+
+
+class BookingError(Exception):
+    """
+    A booking could not be made. ``status`` is the HTTP status to answer with
+    and ``extra`` holds additional fields for the error response.
+    """
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def reserve_table(customer, slot, number_of_people):
+    """
+    Book one table of ``slot`` for the customer and return the Booking.
+    Raises BookingError when the slot is full.
+    """
+    with transaction.atomic():
+        # Lock the slot so concurrent bookings and holds see each other
+        BookingSlot.objects.select_for_update().filter(slot_id=slot.slot_id).first()
+
+        # Check if the slot is still available. The customer's own hold
+        # already reserves their table, so it is not counted against them
+        taken_tables = taken_tables_by_slot([slot.slot_id], exclude_customer=customer).get(slot.slot_id, 0)
+        if taken_tables >= slot.total_tables:
+            raise BookingError('This slot is fully booked', waitlist_available=True)
+
+        # The hold has served its purpose
+        SlotHold.objects.filter(slot_id=slot, customer_id=customer).delete()
+
+        # Create the booking
+        booking = Booking.objects.create(
+            customer_id=customer,
+            slot_id=slot,
+            number_of_people=number_of_people,
+            status='Booked'
+        )
+
+        # Increment the restaurant's times_booked_today counter
+        restaurant = slot.restaurant_id
+        restaurant.times_booked_today += 1
+        restaurant.save()
+
+        # Keep the analytics rollups in step
+        record_booking(booking, restaurant)
+        transaction.on_commit(BOOKINGS_CREATED.labels('direct').inc)
+    return booking
+
+
+def cancel_booking(booking):
+    """
+    Cancel a booking and hand its table to the waitlist. Returns the
+    cancelled Booking. Raises BookingError when it was already cancelled.
+    """
+    with transaction.atomic():
+        # Lock the booking and re-read its status, so of two concurrent
+        # cancels only one updates the counters and rollups
+        booking = (
+            Booking.objects
+            .select_for_update(of=('self',))
+            .select_related('slot_id__restaurant_id')
+            .get(booking_id=booking.booking_id)
+        )
+        if booking.status == 'Cancelled':
+            raise BookingError('Booking is already cancelled')
+
+        # Update booking status
+        booking.status = 'Cancelled'
+        booking.save()
+
+        # Decrement the restaurant's times_booked_today counter
+        restaurant = booking.slot_id.restaurant_id
+        restaurant.times_booked_today = max(0, restaurant.times_booked_today - 1)
+        restaurant.save()
+
+        # Keep the analytics rollups in step
+        record_cancellation(booking, restaurant)
+        transaction.on_commit(BOOKINGS_CANCELLED.inc)
+        # Cancelling changes the day the booking was made, which cached
+        # closed analytics ranges would otherwise keep showing
+        transaction.on_commit(invalidate_restaurants)
+
+        # Hand the freed table to the next party on the waitlist
+        promote_next(booking.slot_id, restaurant)
+    return booking
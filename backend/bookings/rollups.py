@@ -0,0 +1,95 @@
+"""
+Incremental maintenance of DailyBookingRollup.
+
+A booking is counted on the day it was made (``booking_datetime``), under its
+current status. Cancelling moves it from the 'Booked' row to the 'Cancelled'
+row of the same day. Rows are keyed on the restaurant, not on its city, so a
+restaurant that moves keeps its counts consistent.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+from .models import Booking, DailyBookingRollup
+
+
+def _bump(date, restaurant, status, party_size, count_delta, covers_delta):
+    key = {
+        'date': date,
+        'restaurant_id': restaurant,
+        'status': status,
+        'party_size': party_size,
+    }
+    updated = DailyBookingRollup.objects.filter(**key).update(
+        booking_count=F('booking_count') + count_delta,
+        covers=F('covers') + covers_delta
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            DailyBookingRollup.objects.create(**key, booking_count=count_delta, covers=covers_delta)
+    except IntegrityError:
+        # Another request created the row first
+        DailyBookingRollup.objects.filter(**key).update(
+            booking_count=F('booking_count') + count_delta,
+            covers=F('covers') + covers_delta
+        )
+
+
+def booking_date(booking):
+    return booking.booking_datetime.date()
+
+
+def record_booking(booking, restaurant):
+    """
+    Count a newly created booking
+    """
+    _bump(booking_date(booking), restaurant, booking.status, booking.number_of_people, 1, booking.number_of_people)
+
+
+def record_cancellation(booking, restaurant):
+    """
+    Move a booking from the 'Booked' count to the 'Cancelled' count
+    """
+    day = booking_date(booking)
+    _bump(day, restaurant, 'Booked', booking.number_of_people, -1, -booking.number_of_people)
+    _bump(day, restaurant, 'Cancelled', booking.number_of_people, 1, booking.number_of_people)
+
+
+def rebuild_rollups(start_date, end_date, batch_size=1000):
+    """
+    Recompute the rollups for bookings made between two dates (inclusive)
+    Returns the number of rollup rows written
+    """
+    with transaction.atomic():
+        # Lock the rows being replaced before counting. A booking or
+        # cancellation bumping one of them then waits for the rebuild and
+        # applies its change to the new row, so it is either in the count
+        # or applied after it, never lost.
+        replaced = DailyBookingRollup.objects.select_for_update().filter(date__range=(start_date, end_date))
+        list(replaced.values_list('rollup_id', flat=True))
+
+        rows = (
+            Booking.objects
+            .filter(booking_datetime__date__range=(start_date, end_date))
+            .annotate(day=TruncDate('booking_datetime'))
+            .values('day', 'slot_id__restaurant_id', 'status', 'number_of_people')
+            .annotate(booking_count=Count('booking_id'), covers=Sum('number_of_people'))
+            .order_by()
+        )
+        rollups = [
+            DailyBookingRollup(
+                date=row['day'],
+                restaurant_id_id=row['slot_id__restaurant_id'],
+                status=row['status'],
+                party_size=row['number_of_people'],
+                booking_count=row['booking_count'],
+                covers=row['covers']
+            )
+            for row in rows.iterator(chunk_size=batch_size)
+        ]
+        replaced.delete()
+        DailyBookingRollup.objects.bulk_create(rollups, batch_size=batch_size)
+    return len(rollups)
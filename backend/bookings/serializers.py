@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Booking, BookingSlot, Review
+from .models import Booking, BookingSlot, Review, SlotHold, WaitlistEntry
 from users.models import User
 from restaurants.models import Restaurant
 
@@ -23,12 +23,67 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         model = Booking
         fields = ['slot_id', 'number_of_people']
 
+class SlotHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SlotHold
+        fields = ['hold_id', 'slot_id', 'number_of_people', 'created_at', 'expires_at']
+        read_only_fields = ['hold_id', 'created_at', 'expires_at']
+
+class SlotHoldCreateSerializer(serializers.Serializer):
+    # Plain field: the slot is fetched and locked by place_hold
+    slot_id = serializers.IntegerField()
+    number_of_people = serializers.IntegerField(min_value=1)
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    restaurant_id = serializers.IntegerField(source='slot_id.restaurant_id_id', read_only=True)
+    slot_datetime = serializers.DateTimeField(source='slot_id.slot_datetime', read_only=True)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = ['waitlist_id', 'slot_id', 'number_of_people', 'status', 'created_at', 'booking_id', 'restaurant_id', 'slot_datetime']
+        read_only_fields = ['waitlist_id', 'status', 'created_at', 'booking_id']
+
+class WaitlistJoinSerializer(serializers.Serializer):
+    slot_id = serializers.IntegerField()
+    number_of_people = serializers.IntegerField(min_value=1)
+
 class BookingSlotSerializer(serializers.ModelSerializer):
     class Meta:
         model = BookingSlot
         fields = ['slot_id', 'restaurant_id', 'slot_datetime', 'table_size', 'total_tables']
         read_only_fields = ['slot_id']
 
+class BookingSlotBatchCreateSerializer(serializers.Serializer):
+    # Plain fields: ownership of every restaurant is checked in one query by the view
+    restaurant_id = serializers.IntegerField()
+    slot_datetime = serializers.DateTimeField()
+    table_size = serializers.IntegerField(min_value=1)
+    total_tables = serializers.IntegerField(min_value=0)
+
+class BookingSlotBatchUpdateSerializer(serializers.Serializer):
+    slot_id = serializers.IntegerField()
+    slot_datetime = serializers.DateTimeField(required=False)
+    table_size = serializers.IntegerField(min_value=1, required=False)
+    total_tables = serializers.IntegerField(min_value=0, required=False)
+
+class BookingSlotBatchSerializer(serializers.Serializer):
+    create = BookingSlotBatchCreateSerializer(many=True, required=False)
+    update = BookingSlotBatchUpdateSerializer(many=True, required=False)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    MAX_OPERATIONS = 2000
+
+    def validate(self, data):
+        count = sum(len(data.get(key, [])) for key in ('create', 'update', 'delete'))
+        if not count:
+            raise serializers.ValidationError("Provide at least one of create, update or delete")
+        if count > self.MAX_OPERATIONS:
+            raise serializers.ValidationError(f"At most {self.MAX_OPERATIONS} operations per batch")
+        slot_ids = [item['slot_id'] for item in data.get('update', [])] + data.get('delete', [])
+        if len(slot_ids) != len(set(slot_ids)):
+            raise serializers.ValidationError("Each slot_id may appear only once across update and delete")
+        return data
+
 class BookingSlotDetailSerializer(serializers.ModelSerializer):
     restaurant_name = serializers.CharField(source='restaurant_id.name', read_only=True)
     available_tables = serializers.SerializerMethodField()
@@ -1,3 +1,174 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from restaurants.models import Restaurant
+from users.models import User
+from users.token import create_jwt_pair_for_user
+from .models import Booking, BookingSlot, DailyBookingRollup, IdempotencyKey, WaitlistEntry
+from .reservations import cancel_booking, reserve_table
+from .rollups import rebuild_rollups
+
+
+@mock.patch('bookings.views.send_booking_confirmation_email', lambda **kwargs: True)
+@override_settings(IDEMPOTENCY_IN_PROGRESS_TIMEOUT=60)
+class IdempotencyKeyTests(TestCase):
+    url = '/api/bookings/create-booking/'
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = User.objects.create_user(email='manager@example.com', username='manager', password='pw', role='RestaurantManager')
+        cls.customer = User.objects.create_user(email='customer@example.com', username='customer', password='pw', role='Customer')
+        restaurant = Restaurant.objects.create(manager_id=manager, name='Test', address='1 Main St', city='San Jose', approved=True)
+        cls.slot = BookingSlot.objects.create(
+            restaurant_id=restaurant,
+            slot_datetime=timezone.now() + timedelta(days=1),
+            table_size=4,
+            total_tables=5
+        )
+
+    def post(self, key, number_of_people=2):
+        return self.client.post(
+            self.url,
+            {'slot_id': self.slot.slot_id, 'number_of_people': number_of_people},
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f"Bearer {create_jwt_pair_for_user(self.customer)['access']}",
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post('key-1')
+        second = self.post('key-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json()['booking_id'], first.json()['booking_id'])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_key_reused_for_a_different_request_is_rejected(self):
+        self.post('key-1')
+        response = self.post('key-1', number_of_people=3)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_retry_while_the_first_attempt_runs_conflicts(self):
+        first = self.post('key-1')
+        IdempotencyKey.objects.update(status_code=None, response_body=None)
+        response = self.post('key-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_abandoned_claim_is_taken_over_after_the_lease(self):
+        self.post('key-1')
+        # The first attempt's worker died before storing its response
+        Booking.objects.all().delete()
+        IdempotencyKey.objects.update(
+            status_code=None,
+            response_body=None,
+            created_at=timezone.now() - timedelta(seconds=61)
+        )
+        response = self.post('key-1')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+
+class DailyBookingRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        manager = User.objects.create_user(email='manager@example.com', username='manager', password='pw', role='RestaurantManager')
+        cls.customer = User.objects.create_user(email='customer@example.com', username='customer', password='pw', role='Customer')
+        cls.restaurant = Restaurant.objects.create(manager_id=manager, name='Test', address='1 Main St', city='San Jose', approved=True)
+        cls.slot = BookingSlot.objects.create(
+            restaurant_id=cls.restaurant,
+            slot_datetime=timezone.now() + timedelta(days=1),
+            table_size=4,
+            total_tables=5
+        )
+
+    def counts(self):
+        return sorted(DailyBookingRollup.objects.values_list('status', 'party_size', 'booking_count', 'covers'))
+
+    def test_cancelling_after_the_restaurant_moves_matches_a_rebuild(self):
+        booking = reserve_table(self.customer, self.slot, 2)
+        reserve_table(self.customer, self.slot, 2)
+        self.restaurant.city = 'Oakland'
+        self.restaurant.save()
+        cancel_booking(booking)
+
+        incremental = self.counts()
+        today = timezone.now().date()
+        rebuild_rollups(today, today)
+
+        self.assertEqual(incremental, [('Booked', 2, 1, 2), ('Cancelled', 2, 1, 2)])
+        self.assertEqual(self.counts(), incremental)
+
+
+@mock.patch('bookings.views.send_booking_confirmation_email', lambda **kwargs: True)
+@mock.patch('bookings.waitlist.queue_booking_confirmation_email', lambda **kwargs: None)
+@override_settings(QUERY_BUDGET={**settings.QUERY_BUDGET, 'ENABLED': True, 'MODE': 'raise'})
+class BookingQueryBudgetTests(TestCase):
+    """
+    The booking routes stay within their QUERY_BUDGET on their longest paths.
+    Test transactions turn every atomic block into a savepoint, so these
+    count more statements than the same requests in production.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = User.objects.create_user(email='manager@example.com', username='manager', password='pw', role='RestaurantManager')
+        cls.customer = User.objects.create_user(email='customer@example.com', username='customer', password='pw', role='Customer')
+        cls.waiting = User.objects.create_user(email='waiting@example.com', username='waiting', password='pw', role='Customer')
+        restaurant = Restaurant.objects.create(manager_id=manager, name='Test', address='1 Main St', city='San Jose', approved=True)
+        cls.slot = BookingSlot.objects.create(
+            restaurant_id=restaurant,
+            slot_datetime=timezone.now() + timedelta(days=1),
+            table_size=4,
+            total_tables=1
+        )
+
+    def post(self, url, data=None, key='key-1'):
+        return self.client.post(
+            url, data or {},
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f"Bearer {create_jwt_pair_for_user(self.customer)['access']}",
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def abandon_key(self):
+        IdempotencyKey.objects.update(
+            status_code=None,
+            response_body=None,
+            created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT + 1)
+        )
+
+    def test_create_booking(self):
+        response = self.post('/api/bookings/create-booking/', {'slot_id': self.slot.slot_id, 'number_of_people': 2})
+        self.assertEqual(response.status_code, 201)
+
+    def test_create_booking_taking_over_an_abandoned_key(self):
+        self.post('/api/bookings/create-booking/', {'slot_id': self.slot.slot_id, 'number_of_people': 2})
+        Booking.objects.all().delete()
+        DailyBookingRollup.objects.all().delete()
+        self.abandon_key()
+
+        response = self.post('/api/bookings/create-booking/', {'slot_id': self.slot.slot_id, 'number_of_people': 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_cancel_booking_promoting_the_waitlist(self):
+        booking = reserve_table(self.customer, self.slot, 2)
+        WaitlistEntry.objects.create(slot_id=self.slot, customer_id=self.waiting, number_of_people=3)
+
+        response = self.post(f'/api/bookings/my-bookings/{booking.booking_id}/cancel/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(WaitlistEntry.objects.get().status, 'Promoted')
@@ -1,10 +1,16 @@
 from django.urls import path
+from .async_views import cancel_booking_async, create_booking_async, restaurant_reviews_async
 from .views import (
     BookingSlotListCreateView, 
     BookingSlotDetailView,
+    BookingSlotBatchView,
     CreateRecurringBookingSlotsView,
     AvailableSlotsView,
     CreateBookingView,
+    SlotHoldCreateView,
+    SlotHoldDetailView,
+    WaitlistView,
+    WaitlistDetailView,
     UserBookingsView,
     BookingDetailView,
     CancelBookingView,
@@ -13,17 +19,23 @@ from .views import (
     # BookingListView,
     ReviewCreateView,
     RestaurantReviewsView,
-    ReviewCreateBodyView
+    ReviewCreateBodyView,
+    ExportView
 )
 
 urlpatterns = [
     # Booking slot management (for restaurant managers)
     path('slots/', BookingSlotListCreateView.as_view(), name='booking-slot-list-create'),
     path('slots/<int:pk>/', BookingSlotDetailView.as_view(), name='booking-slot-detail'),
+    path('slots/batch/', BookingSlotBatchView.as_view(), name='booking-slot-batch'),
     path('slots/recurring/', CreateRecurringBookingSlotsView.as_view(), name='create-recurring-booking-slots'),
     
     # User booking endpoints
     path('restaurants/<int:restaurant_id>/available-slots/', AvailableSlotsView.as_view(), name='available-slots'),
+    path('holds/', SlotHoldCreateView.as_view(), name='slot-hold-create'),
+    path('holds/<int:hold_id>/', SlotHoldDetailView.as_view(), name='slot-hold-detail'),
+    path('waitlist/', WaitlistView.as_view(), name='waitlist'),
+    path('waitlist/<int:waitlist_id>/', WaitlistDetailView.as_view(), name='waitlist-detail'),
     path('create-booking/', CreateBookingView.as_view(), name='create-booking'),
     path('my-bookings/', UserBookingsView.as_view(), name='user-bookings'),
     path('my-bookings/<int:pk>/', BookingDetailView.as_view(), name='booking-detail'),
@@ -42,4 +54,12 @@ urlpatterns = [
     path('restaurants/<int:restaurant_id>/reviews/', RestaurantReviewsView.as_view(), name='restaurant-reviews'),
     path('restaurants/<int:restaurant_id>/reviews/create/', ReviewCreateView.as_view(), name='review-create'),
     path('reviews/create/', ReviewCreateBodyView.as_view(), name='review-create-body'),
+
+    # Async variants, for ASGI deployments
+    path('async/restaurants/<int:restaurant_id>/reviews/', restaurant_reviews_async, name='restaurant-reviews-async'),
+    path('async/create-booking/', create_booking_async, name='create-booking-async'),
+    path('async/my-bookings/<int:booking_id>/cancel/', cancel_booking_async, name='cancel-booking-async'),
+
+    # Streaming exports (admins and restaurant managers)
+    path('exports/<str:dataset>/', ExportView.as_view(), name='export'),
 ]
\ No newline at end of file
@@ -1,17 +1,21 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from django.conf import settings
+from django.db import transaction
 from django.template.loader import render_to_string
+from backend.background import run_in_background
 
-def send_booking_confirmation_email(user_email, user_name, booking_details):
+def send_booking_confirmation_email(user_email, user_name, booking_details, subject='Booking Confirmation - Table Reservation'):
     """
     Send a booking confirmation email to the user
     """
+    # Only the background threads that send mail need these
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
     try:
         # Create message container
         msg = MIMEMultipart('alternative')
-        msg['Subject'] = 'Booking Confirmation - Table Reservation'
+        msg['Subject'] = subject
         msg['From'] = settings.EMAIL_HOST_USER
         msg['To'] = user_email
 
@@ -39,4 +43,13 @@ def send_booking_confirmation_email(user_email, user_name, booking_details):
         return True
     except Exception as e:
         print(f"Error sending email: {str(e)}")
-        return False 
\ No newline at end of file
+        return False
+
+def queue_booking_confirmation_email(user_email, user_name, booking_details, subject='Booking Confirmation - Table Reservation'):
+    """
+    Send the confirmation email on the background thread pool once the
+    current transaction commits, so SMTP never holds a request or a lock
+    """
+    transaction.on_commit(lambda: run_in_background(
+        send_booking_confirmation_email, user_email, user_name, booking_details, subject
+    ))
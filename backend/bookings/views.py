@@ -2,34 +2,69 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from .models import BookingSlot, Booking, Review
+from .models import BookingSlot, Booking, Review, WaitlistEntry
 from .serializers import (
     BookingSerializer, BookingCreateSerializer, 
     BookingSlotSerializer, BookingSlotDetailSerializer,
-    ReviewSerializer
+    BookingSlotBatchSerializer, ReviewSerializer,
+    SlotHoldSerializer, SlotHoldCreateSerializer, WaitlistEntrySerializer,
+    WaitlistJoinSerializer
 )
 from restaurants.models import Restaurant, RestaurantHours
 from restaurants.views import IsRestaurantManager
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from restaurants.cache import invalidate_restaurants
+from users.authentication import ClaimsJWTAuthentication, get_cached_user
 from datetime import datetime, timedelta
 import pytz
 from django.utils import timezone
+from django.db import transaction
 from .utils import send_booking_confirmation_email
+from .exports import DATASETS, FORMATS, STREAMERS, export_queryset
+from django.http import StreamingHttpResponse
+from .availability import booked_tables_by_slot, taken_tables_by_slot
+from .holds import HoldError, place_hold, release_hold
+from .idempotency import idempotent
+from .reservations import BookingError, cancel_booking, reserve_table
+from .waitlist import WaitlistError, join_waitlist, waitlist_position
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from backend.log import HOT_PATH
 import logging
 
 # Get logger for bookings app
 logger = logging.getLogger('bookings')
 
 # BookingSlot Views
+class SlotCursorPagination(CursorPagination):
+    # Keyset pagination: pages stay fast however deep the client pages
+    ordering = ('slot_datetime', 'slot_id')
+    page_size = 100
+    page_size_query_param = 'limit'
+    max_page_size = 500
+
 class BookingSlotListCreateView(generics.ListCreateAPIView):
     serializer_class = BookingSlotSerializer
     permission_classes = [permissions.IsAuthenticated, IsRestaurantManager]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
+    pagination_class = SlotCursorPagination
 
     def get_queryset(self):
-        logger.info(f"Listing booking slots for manager: {self.request.user.username}")
+        logger.info("Listing booking slots for manager: %s", self.request.user.username, extra=HOT_PATH)
         # Only show slots for restaurants managed by the user
-        return BookingSlot.objects.filter(restaurant_id__manager_id=self.request.user)
+        queryset = BookingSlot.objects.filter(restaurant_id__manager_id=self.request.user)
+
+        # Optional filters: restaurant_id and a start/end date range
+        params = self.request.query_params
+        try:
+            if params.get('restaurant_id'):
+                queryset = queryset.filter(restaurant_id=int(params['restaurant_id']))
+            if params.get('start'):
+                queryset = queryset.filter(slot_datetime__date__gte=datetime.strptime(params['start'], "%Y-%m-%d").date())
+            if params.get('end'):
+                queryset = queryset.filter(slot_datetime__date__lte=datetime.strptime(params['end'], "%Y-%m-%d").date())
+        except ValueError:
+            raise ValidationError({'error': 'restaurant_id must be an integer, start and end must be YYYY-MM-DD'})
+        return queryset
 
     def perform_create(self, serializer):
         restaurant_id = self.request.data.get('restaurant_id')
@@ -43,9 +78,111 @@ class BookingSlotDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated, IsRestaurantManager]
 
     def get_queryset(self):
-        logger.info(f"Retrieving booking slot details for manager: {self.request.user.username}")
+        logger.info("Retrieving booking slot details for manager: %s", self.request.user.username, extra=HOT_PATH)
         return BookingSlot.objects.filter(restaurant_id__manager_id=self.request.user)
 
+    def perform_update(self, serializer):
+        total_tables = serializer.validated_data.get('total_tables')
+        if total_tables is not None:
+            booked = booked_tables_by_slot([serializer.instance.slot_id]).get(serializer.instance.slot_id, 0)
+            if total_tables < booked:
+                raise ValidationError({
+                    'total_tables': f'{booked} tables are already booked for this slot'
+                })
+        serializer.save()
+
+# View for creating, updating and deleting many slots in one transaction
+class BookingSlotBatchView(APIView):
+    """
+    POST {"create": [...], "update": [...], "delete": [slot_id, ...]}
+
+    All operations succeed or fail together. Ownership is checked with one
+    query per side, and capacity with one aggregate over the touched slots:
+    total_tables cannot drop below the tables already booked, and slots with
+    active bookings cannot be deleted.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsRestaurantManager]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def post(self, request):
+        serializer = BookingSlotBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        creates = serializer.validated_data.get('create', [])
+        updates = serializer.validated_data.get('update', [])
+        deletes = serializer.validated_data.get('delete', [])
+        logger.info(f"Slot batch by manager {request.user.username}: {len(creates)} create, {len(updates)} update, {len(deletes)} delete")
+
+        restaurant_ids = {item['restaurant_id'] for item in creates}
+        owned = set(Restaurant.objects.filter(
+            restaurant_id__in=restaurant_ids, manager_id=request.user
+        ).values_list('restaurant_id', flat=True))
+        if restaurant_ids - owned:
+            return Response({
+                'error': 'Restaurants not found',
+                'restaurant_ids': sorted(restaurant_ids - owned)
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        slot_ids = [item['slot_id'] for item in updates] + deletes
+        with transaction.atomic():
+            slots = {
+                slot.slot_id: slot
+                for slot in BookingSlot.objects.select_for_update(of=('self',)).filter(
+                    slot_id__in=slot_ids, restaurant_id__manager_id=request.user
+                )
+            }
+            missing = [slot_id for slot_id in slot_ids if slot_id not in slots]
+            if missing:
+                return Response({
+                    'error': 'Booking slots not found',
+                    'slot_ids': missing
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            booked = booked_tables_by_slot(slot_ids)
+            conflicts = [
+                {'slot_id': item['slot_id'], 'booked': booked.get(item['slot_id'], 0)}
+                for item in updates
+                if 'total_tables' in item and item['total_tables'] < booked.get(item['slot_id'], 0)
+            ] + [
+                {'slot_id': slot_id, 'booked': booked[slot_id]}
+                for slot_id in deletes
+                if booked.get(slot_id)
+            ]
+            if conflicts:
+                return Response({
+                    'error': 'Changes conflict with existing bookings',
+                    'conflicts': conflicts
+                }, status=status.HTTP_409_CONFLICT)
+
+            updated_fields = set()
+            for item in updates:
+                slot = slots[item['slot_id']]
+                for field, value in item.items():
+                    if field != 'slot_id':
+                        setattr(slot, field, value)
+                        updated_fields.add(field)
+            if updated_fields:
+                BookingSlot.objects.bulk_update([slots[item['slot_id']] for item in updates], sorted(updated_fields))
+
+            if deletes:
+                BookingSlot.objects.filter(slot_id__in=deletes).delete()
+
+            created = BookingSlot.objects.bulk_create([
+                BookingSlot(
+                    restaurant_id_id=item['restaurant_id'],
+                    slot_datetime=item['slot_datetime'],
+                    table_size=item['table_size'],
+                    total_tables=item['total_tables']
+                )
+                for item in creates
+            ])
+
+        return Response({
+            'created': BookingSlotSerializer(created, many=True).data,
+            'updated': [item['slot_id'] for item in updates],
+            'deleted': deletes
+        }, status=status.HTTP_200_OK)
+
 # View for creating recurring booking slots
 class CreateRecurringBookingSlotsView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsRestaurantManager]
@@ -146,7 +283,7 @@ class AvailableSlotsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, restaurant_id):
-        logger.info(f"Fetching available slots for restaurant {restaurant_id}")
+        logger.info("Fetching available slots for restaurant %s", restaurant_id, extra=HOT_PATH)
         # Get query parameters
         date_str = request.query_params.get('date')
         num_people = request.query_params.get('people')
@@ -193,18 +330,15 @@ class AvailableSlotsView(APIView):
                 table_size__gte=num_people
             ).order_by('slot_datetime')
             
-            # Filter out slots that are fully booked
-            available_slots = []
-            for slot in slots:
-                booked_tables = Booking.objects.filter(
-                    slot_id=slot,
-                    status='Booked'
-                ).count()
-                
-                if booked_tables < slot.total_tables:
-                    available_slots.append(slot)
+            # Filter out slots that are fully booked or held by other customers
+            slots = list(slots)
+            taken = taken_tables_by_slot([slot.slot_id for slot in slots], exclude_customer=request.user)
+            available_slots = [
+                slot for slot in slots
+                if taken.get(slot.slot_id, 0) < slot.total_tables
+            ]
             
-            logger.info(f"Found {len(available_slots)} available slots for restaurant {restaurant_id}")
+            logger.info("Found %d available slots for restaurant %s", len(available_slots), restaurant_id, extra=HOT_PATH)
             # Serialize available slots
             serializer = BookingSlotDetailSerializer(available_slots, many=True)
             
@@ -224,6 +358,7 @@ class AvailableSlotsView(APIView):
 class CreateBookingView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         logger.info(f"Creating booking for user: {request.user.username}")
         serializer = BookingCreateSerializer(data=request.data)
@@ -236,25 +371,13 @@ class CreateBookingView(APIView):
             try:
                 # Convert slot_id to integer if it's not already
                 slot_id = int(slot_id) if not isinstance(slot_id, int) else slot_id
-                slot = BookingSlot.objects.get(slot_id=slot_id)
+                slot = BookingSlot.objects.select_related('restaurant_id').get(slot_id=slot_id, restaurant_id__deleted_at__isnull=True)
             except (BookingSlot.DoesNotExist, ValueError):
                 logger.error(f"Booking slot not found: {slot_id}")
                 return Response({
                     'error': 'Booking slot not found'
                 }, status=status.HTTP_404_NOT_FOUND)
             
-            # Check if the slot is still available
-            booked_tables = Booking.objects.filter(
-                slot_id_id=slot.slot_id,
-                status='Booked'
-            ).count()
-            
-            if booked_tables >= slot.total_tables:
-                logger.warning(f"Slot {slot_id} is fully booked")
-                return Response({
-                    'error': 'This slot is fully booked'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
             # Check if the number of people is appropriate for the table size
             if number_of_people > slot.table_size:
                 logger.warning(f"Table size mismatch: requested {number_of_people} people for table size {slot.table_size}")
@@ -262,18 +385,15 @@ class CreateBookingView(APIView):
                     'error': f'This table can only accommodate up to {slot.table_size} people'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Create the booking
-            booking = Booking.objects.create(
-                customer_id=request.user,
-                slot_id=slot,
-                number_of_people=number_of_people,
-                status='Booked'
-            )
-            
-            # Increment the restaurant's times_booked_today counter
+            try:
+                booking = reserve_table(request.user, slot, number_of_people)
+            except BookingError as e:
+                logger.warning(f"Slot {slot_id} is fully booked")
+                return Response({
+                    'error': str(e),
+                    **e.extra
+                }, status=e.status)
             restaurant = slot.restaurant_id
-            restaurant.times_booked_today += 1
-            restaurant.save()
             
             logger.info(f"Booking created successfully: {booking.booking_id} for user {request.user.username}")
 
@@ -289,8 +409,10 @@ class CreateBookingView(APIView):
             
             # Send confirmation email
             try:
+                # The token only carries role claims, the email comes from the cached user row
+                customer = get_cached_user(request.user.pk)
                 send_booking_confirmation_email(
-                    user_email=request.user.email,
+                    user_email=customer.email,
                     user_name=request.user.username,
                     booking_details=booking_details
                 )
@@ -303,6 +425,83 @@ class CreateBookingView(APIView):
         logger.warning(f"Invalid booking data: {serializer.errors}")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# Views for holding a table while the customer completes the booking
+class SlotHoldCreateView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def post(self, request):
+        serializer = SlotHoldCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        slot_id = serializer.validated_data['slot_id']
+        try:
+            hold = place_hold(request.user, slot_id, serializer.validated_data['number_of_people'])
+        except HoldError as e:
+            logger.warning(f"Hold on slot {slot_id} refused for user {request.user.username}: {str(e)}")
+            return Response({'error': str(e)}, status=e.status)
+        logger.info(f"Hold {hold.hold_id} on slot {slot_id} placed for user {request.user.username}")
+        return Response(SlotHoldSerializer(hold).data, status=status.HTTP_201_CREATED)
+
+class SlotHoldDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def delete(self, request, hold_id):
+        if not release_hold(request.user, hold_id):
+            return Response({
+                'error': 'Hold not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        logger.info(f"Hold {hold_id} released by user {request.user.username}")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+# Views for waiting on a full slot
+class WaitlistView(generics.ListCreateAPIView):
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def get_queryset(self):
+        return WaitlistEntry.objects.filter(customer_id=self.request.user).select_related('slot_id').order_by('-created_at')
+
+    def create(self, request, *args, **kwargs):
+        serializer = WaitlistJoinSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        slot_id = serializer.validated_data['slot_id']
+        try:
+            entry = join_waitlist(request.user, slot_id, serializer.validated_data['number_of_people'])
+        except WaitlistError as e:
+            logger.warning(f"User {request.user.username} could not join waitlist for slot {slot_id}: {str(e)}")
+            return Response({'error': str(e)}, status=e.status)
+        logger.info(f"User {request.user.username} joined waitlist for slot {slot_id}")
+        return Response({
+            **WaitlistEntrySerializer(entry).data,
+            'position': waitlist_position(entry)
+        }, status=status.HTTP_201_CREATED)
+
+class WaitlistDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def get(self, request, waitlist_id):
+        entry = get_object_or_404(WaitlistEntry.objects.select_related('slot_id'), waitlist_id=waitlist_id, customer_id=request.user)
+        data = WaitlistEntrySerializer(entry).data
+        if entry.status == 'Waiting':
+            data['position'] = waitlist_position(entry)
+        return Response(data)
+
+    def delete(self, request, waitlist_id):
+        updated = WaitlistEntry.objects.filter(
+            waitlist_id=waitlist_id, customer_id=request.user, status='Waiting'
+        ).update(status='Cancelled')
+        if not updated:
+            return Response({
+                'error': 'Waitlist entry not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        logger.info(f"User {request.user.username} left waitlist entry {waitlist_id}")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 class UserBookingsView(generics.ListAPIView):
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -322,13 +521,15 @@ class BookingDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         # Only allow updating the status to 'Cancelled'
         if 'status' in request.data and request.data['status'] == 'Cancelled':
-            instance.status = 'Cancelled'
-            instance.save()
-            
-            # Decrement the restaurant's times_booked_today counter
-            restaurant = instance.slot_id.restaurant_id
-            restaurant.times_booked_today = max(0, restaurant.times_booked_today - 1)
-            restaurant.save()
+            if instance.status == 'Cancelled':
+                return Response({
+                    'error': 'Booking is already cancelled'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                instance = cancel_booking(instance)
+            except BookingError as e:
+                return Response({'error': str(e)}, status=e.status)
             
             serializer = self.get_serializer(instance)
             return Response(serializer.data)
@@ -337,9 +538,22 @@ class BookingDetailView(generics.RetrieveUpdateDestroyAPIView):
             'error': 'Only cancelling bookings is allowed'
         }, status=status.HTTP_400_BAD_REQUEST)
 
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        # Deleting a live booking would skip the counters, rollups and waitlist
+        if instance.status == 'Booked':
+            return Response({
+                'error': 'Cancel the booking before deleting it'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        self.perform_destroy(instance)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 class CancelBookingView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
+    @idempotent
     def post(self, request, booking_id):
         try:
             booking = Booking.objects.get(booking_id=booking_id, customer_id=request.user)
@@ -353,22 +567,19 @@ class CancelBookingView(APIView):
                 'error': 'Booking is already cancelled'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update booking status
-        booking.status = 'Cancelled'
-        booking.save()
-        
-        # Decrement the restaurant's times_booked_today counter
-        restaurant = booking.slot_id.restaurant_id
-        restaurant.times_booked_today = max(0, restaurant.times_booked_today - 1)
-        restaurant.save()
+        try:
+            booking = cancel_booking(booking)
+        except BookingError as e:
+            return Response({'error': str(e)}, status=e.status)
         
         serializer = BookingSerializer(booking)
         return Response(serializer.data)
 
 class ReviewCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
+    @idempotent
     def post(self, request):
         # Get the restaurant
         restaurant = get_object_or_404(Restaurant, restaurant_id=request.data.get('restaurant_id'), approved=True)
@@ -396,6 +607,7 @@ class ReviewCreateView(APIView):
 
             # Save the review
             serializer.save()
+            invalidate_restaurants([restaurant.restaurant_id])
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -403,7 +615,7 @@ class ReviewCreateView(APIView):
 class RestaurantReviewsView(generics.ListAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.AllowAny]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get_queryset(self):
         restaurant_id = self.kwargs['restaurant_id']
@@ -411,8 +623,9 @@ class RestaurantReviewsView(generics.ListAPIView):
 
 class ReviewCreateBodyView(APIView):
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
+    @idempotent
     def post(self, request):
         # Get the restaurant_id from request body
         restaurant_id = request.data.get('restaurant_id')
@@ -452,8 +665,53 @@ class ReviewCreateBodyView(APIView):
 
             # Save the review
             serializer.save()
+            invalidate_restaurants([restaurant.restaurant_id])
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class IsAdminOrRestaurantManager(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role in ('Admin', 'RestaurantManager')
+
+class ExportView(APIView):
+    """
+    Stream bookings, slots or reviews as CSV or NDJSON.
+
+    Admins can export every restaurant, managers only the restaurants they own.
+    Optional filters: start/end (YYYY-MM-DD) and restaurant_id (comma separated).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdminOrRestaurantManager]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def get(self, request, dataset):
+        if dataset not in DATASETS:
+            return Response({
+                'error': f'dataset must be one of: {", ".join(DATASETS)}'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        # 'format' is reserved by DRF for content negotiation
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in FORMATS:
+            return Response({
+                'error': f'file_format must be one of: {", ".join(FORMATS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            start_date = datetime.strptime(request.query_params['start'], "%Y-%m-%d").date() \
+                if request.query_params.get('start') else None
+            end_date = datetime.strptime(request.query_params['end'], "%Y-%m-%d").date() \
+                if request.query_params.get('end') else None
+            restaurant_ids = [int(value) for value in request.query_params.get('restaurant_id', '').split(',') if value]
+        except ValueError as e:
+            return Response({
+                'error': f'Invalid parameter format: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        manager = request.user if request.user.role == 'RestaurantManager' else None
+        rows = export_queryset(dataset, start_date, end_date, restaurant_ids, manager)
+        logger.info(f"Streaming {dataset} export as {file_format} for user {request.user.username}")
 
+        response = StreamingHttpResponse(STREAMERS[file_format](dataset, rows), content_type=FORMATS[file_format])
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{file_format}"'
+        return response
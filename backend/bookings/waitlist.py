@@ -0,0 +1,137 @@
+"""
+Waitlist for full slots.
+
+Customers join the waitlist of a full slot instead of polling availability.
+Whenever a cancellation frees a table, ``promote_next`` books it for the
+oldest waiting party that fits, inside the cancelling transaction, and the
+customer is emailed from the background pool once that transaction commits.
+"""
+
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from backend.metrics import BOOKINGS_CREATED
+from .availability import taken_tables_by_slot
+from .models import Booking, BookingSlot, WaitlistEntry
+from .rollups import record_booking
+from .utils import queue_booking_confirmation_email
+
+logger = logging.getLogger('bookings')
+
+
+class WaitlistError(Exception):
+    """
+    A customer could not join a waitlist. ``status`` is the HTTP status to answer with.
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def join_waitlist(customer, slot_id, number_of_people):
+    """
+    Add the customer to a full slot's waitlist. Returns the WaitlistEntry.
+    """
+    with transaction.atomic():
+        try:
+            slot = BookingSlot.objects.select_for_update().get(
+                slot_id=slot_id,
+                restaurant_id__deleted_at__isnull=True,
+                restaurant_id__approved=True
+            )
+        except BookingSlot.DoesNotExist:
+            raise WaitlistError('Booking slot not found', status=404)
+
+        if number_of_people > slot.table_size:
+            raise WaitlistError(f'This table can only accommodate up to {slot.table_size} people')
+        if WaitlistEntry.objects.filter(slot_id=slot, customer_id=customer, status='Waiting').exists():
+            raise WaitlistError('You are already on the waitlist for this slot', status=409)
+        if Booking.objects.filter(slot_id=slot, customer_id=customer, status='Booked').exists():
+            raise WaitlistError('You already have a booking for this slot', status=409)
+
+        taken = taken_tables_by_slot([slot.slot_id], exclude_customer=customer).get(slot.slot_id, 0)
+        if taken < slot.total_tables:
+            raise WaitlistError('This slot has free tables, book it directly', status=409)
+
+        return WaitlistEntry.objects.create(
+            slot_id=slot,
+            customer_id=customer,
+            number_of_people=number_of_people
+        )
+
+
+def waitlist_position(entry):
+    """
+    Return the 1-based position of a waiting entry in its slot's queue
+    """
+    return WaitlistEntry.objects.filter(
+        slot_id=entry.slot_id_id,
+        status='Waiting',
+        waitlist_id__lte=entry.waitlist_id
+    ).count()
+
+
+def promote_next(slot, restaurant):
+    """
+    Book the freed table for the next waiting party, if any.
+
+    Must be called inside the transaction that freed the table. Returns the
+    new Booking, or None when nobody was promoted. Slots that have already
+    started are never promoted, and neither are parties that booked the
+    slot directly since joining its waitlist.
+    """
+    # Serialise with bookings, holds and other cancellations on this slot
+    slot = BookingSlot.objects.select_for_update().get(slot_id=slot.slot_id)
+    if slot.slot_datetime <= timezone.now():
+        return None
+    taken = taken_tables_by_slot([slot.slot_id]).get(slot.slot_id, 0)
+    if taken >= slot.total_tables:
+        return None
+
+    entry = (
+        WaitlistEntry.objects
+        .select_related('customer_id')
+        .filter(slot_id=slot, status='Waiting', number_of_people__lte=slot.table_size)
+        .exclude(customer_id__in=Booking.objects.filter(slot_id=slot, status='Booked').values('customer_id'))
+        .order_by('waitlist_id')
+        .first()
+    )
+    if entry is None:
+        return None
+
+    booking = Booking.objects.create(
+        customer_id=entry.customer_id,
+        slot_id=slot,
+        number_of_people=entry.number_of_people,
+        status='Booked'
+    )
+    entry.status = 'Promoted'
+    entry.booking_id = booking
+    entry.save(update_fields=['status', 'booking_id'])
+
+    # Increment the restaurant's times_booked_today counter
+    restaurant.times_booked_today += 1
+    restaurant.save()
+
+    # Keep the analytics rollups in step
+    record_booking(booking, restaurant)
+    transaction.on_commit(BOOKINGS_CREATED.labels('waitlist').inc)
+
+    logger.info(f"Promoted waitlist entry {entry.waitlist_id} to booking {booking.booking_id} on slot {slot.slot_id}")
+
+    queue_booking_confirmation_email(
+        user_email=entry.customer_id.email,
+        user_name=entry.customer_id.username,
+        booking_details={
+            'restaurant_name': restaurant.name,
+            'booking_date': slot.slot_datetime.strftime('%Y-%m-%d'),
+            'booking_time': slot.slot_datetime.strftime('%I:%M %p'),
+            'number_of_people': entry.number_of_people,
+            'booking_id': booking.booking_id
+        },
+        subject='Waitlist Update - Your Table Is Booked'
+    )
+    return booking
@@ -0,0 +1,117 @@
+"""
+Gunicorn configuration for production.
+
+    gunicorn -c gunicorn.conf.py
+
+Workers are threaded WSGI workers (gthread) serving backend.wsgi:application.
+Every endpoint the frontend calls is a sync DRF view, and those are served
+fastest on a thread per request; under ASGI, Django runs them one at a time
+per worker (see benchmarks/async_concurrency.py). Set
+GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker to serve
+backend.asgi:application on uvicorn's ASGI worker instead, for deployments
+that send their traffic to the /async/ endpoints. Every setting can be
+overridden from the environment; the defaults are derived from the CPUs the
+container may use.
+"""
+
+import math
+import os
+import shutil
+
+
+def available_cpus():
+    """
+    CPUs this process may use, honouring the container's cgroup CPU quota
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+cpus = available_cpus()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+asgi_worker = worker_class.startswith('uvicorn.')
+
+# The application follows the worker type, unless one is given on the command line
+wsgi_app = 'backend.asgi:application' if asgi_worker else 'backend.wsgi:application'
+
+# Threaded workers spend most of their time waiting on the database, so they
+# get 2 per CPU plus one, with a few threads each. An event-loop worker keeps
+# a core busy on its own, so one per CPU plus a spare.
+if asgi_worker:
+    workers = int(os.getenv('WEB_CONCURRENCY', cpus + 1))
+    threads = 1
+else:
+    workers = int(os.getenv('WEB_CONCURRENCY', cpus * 2 + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Import Django and the app once in the master; workers fork ready to serve
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Recycle workers now and then to cap slow memory growth. The jitter keeps
+# them from all restarting at once.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+# A worker silent for this long is killed and replaced
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))  # seconds
+# Time in-flight requests get to finish on restart or scale-in
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))  # seconds
+# Keep idle connections from the load balancer open longer than its own idle
+# timeout (60 seconds on an ALB), so it never reuses a connection we closed
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 75))  # seconds
+
+# Worker heartbeats go to memory rather than the container's overlay filesystem
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Workers share Prometheus samples through mmap'd files here, so /metrics
+# reports every worker whichever one answers the scrape. Set up before the app
+# is preloaded, since prometheus_client opens its files there on import.
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    '/dev/shm/prometheus' if os.path.isdir('/dev/shm') else '/tmp/prometheus'
+)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+accesslog = None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    # Samples left by a previous run would be counted again. Workers notice
+    # the files they inherited are gone and open their own.
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def when_ready(server):
+    if preload_app:
+        # Django imports the URLconf, and with it every view, on the first
+        # request; do it once here so no worker pays for it
+        from django.urls import get_resolver
+        get_resolver().url_patterns
+
+
+def post_fork(server, worker):
+    # Never share a database connection opened by the master while preloading
+    from django.db import connections
+    connections.close_all()
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's samples from live gauges such as pending jobs
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,15 +1,28 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db.models import Count, Sum, Avg
+from users.authentication import ClaimsJWTAuthentication
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum, Avg, Q
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
 from .models import Restaurant
 from .serializers import RestaurantSerializer
-from bookings.models import Booking, Review
+from .tasks import finished_purge, schedule_restaurant_purge
+from .cache import global_version, invalidate_restaurants
+from .analytics import BUCKETS, bucket_starts, parse_datetime_param, zero_filled
+from backend.metrics import record_cache_lookup
+from bookings.models import Booking, DailyBookingRollup, Review
 from users.models import User
 
+def parse_date_param(value):
+    """
+    Parse an optional YYYY-MM-DD query parameter
+    """
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
 # Custom permission to restrict access to Admins
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -19,7 +32,7 @@ class IsAdmin(permissions.BasePermission):
 class UnapprovedRestaurantListView(generics.ListAPIView):
     serializer_class = RestaurantSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         return Restaurant.objects.filter(approved=False)
@@ -28,7 +41,7 @@ class UnapprovedRestaurantListView(generics.ListAPIView):
 class ApprovedRestaurantListView(generics.ListAPIView):
     serializer_class = RestaurantSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     
     def get_queryset(self):
         return Restaurant.objects.filter(approved=True)
@@ -36,80 +49,210 @@ class ApprovedRestaurantListView(generics.ListAPIView):
 # View to approve a restaurant
 class ApproveRestaurantView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def post(self, request, restaurant_id):
-        try:
-            restaurant = Restaurant.objects.get(restaurant_id=restaurant_id)
-            restaurant.approved = True
-            restaurant.save()
-            return Response({
-                'message': f'Restaurant {restaurant.name} has been approved'
-            }, status=status.HTTP_200_OK)
-        except Restaurant.DoesNotExist:
+        restaurant = Restaurant.objects.filter(restaurant_id=restaurant_id).only('restaurant_id', 'name').first()
+        if restaurant is None:
             return Response({
                 'error': 'Restaurant not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
+        Restaurant.objects.filter(restaurant_id=restaurant_id).update(approved=True, updated_at=timezone.now())
+        invalidate_restaurants([restaurant_id])
+        return Response({
+            'message': f'Restaurant {restaurant.name} has been approved'
+        }, status=status.HTTP_200_OK)
+
 # View to remove a restaurant
 class RemoveRestaurantView(APIView):
+    """
+    Removing hides the restaurant at once and purges its bookings, slots,
+    reviews, hours and photos in the background. GET reports purge progress.
+    """
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def delete(self, request, restaurant_id):
-        try:
-            restaurant = Restaurant.objects.get(restaurant_id=restaurant_id)
-            restaurant_name = restaurant.name
-            restaurant.delete()
-            return Response({
-                'message': f'Restaurant {restaurant_name} has been removed'
-            }, status=status.HTTP_200_OK)
-        except Restaurant.DoesNotExist:
+        restaurant = Restaurant.objects.filter(restaurant_id=restaurant_id).only('restaurant_id', 'name').first()
+        if restaurant is None:
             return Response({
                 'error': 'Restaurant not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-# View to get analytics dashboard for the last month
+        with transaction.atomic():
+            Restaurant.objects.filter(restaurant_id=restaurant_id).update(
+                deleted_at=timezone.now(),
+                approved=False,
+                deletion_progress={'status': 'queued'}
+            )
+            schedule_restaurant_purge(restaurant_id)
+        invalidate_restaurants([restaurant_id])
+
+        return Response({
+            'message': f'Restaurant {restaurant.name} has been removed'
+        }, status=status.HTTP_202_ACCEPTED)
+
+    def get(self, request, restaurant_id):
+        restaurant = Restaurant.all_objects.filter(
+            restaurant_id=restaurant_id, deleted_at__isnull=False
+        ).values('deleted_at', 'deletion_progress').first()
+        if restaurant is None:
+            progress = finished_purge(restaurant_id)
+            if progress is not None:
+                return Response({
+                    'restaurant_id': restaurant_id,
+                    'progress': progress
+                }, status=status.HTTP_200_OK)
+            return Response({
+                'error': 'No pending removal for this restaurant'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'restaurant_id': restaurant_id,
+            'deleted_at': restaurant['deleted_at'],
+            'progress': restaurant['deletion_progress']
+        }, status=status.HTTP_200_OK)
+
+# View to approve, reject or remove many restaurants at once
+class BulkRestaurantModerationView(APIView):
+    """
+    POST {"restaurant_ids": [...]} to admin/bulk/<approve|reject|remove>/.
+
+    Each action is one SELECT to classify the ids and one UPDATE for the whole
+    batch, followed by a single cache invalidation. Rejecting moves restaurants
+    back to pending approval; removing soft-deletes them and queues the purge.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    MAX_BATCH_SIZE = 1000
+    ACTIONS = {
+        # action: (state the restaurant must not already be in, result label)
+        'approve': ('approved', 'approved'),
+        'reject': ('pending', 'rejected'),
+        'remove': (None, 'removed'),
+    }
+
+    def post(self, request, action):
+        if action not in self.ACTIONS:
+            return Response({
+                'error': f'action must be one of: {", ".join(self.ACTIONS)}'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        restaurant_ids = request.data.get('restaurant_ids')
+        # Anything else would iterate too: the string "123" as ids 1, 2 and 3
+        if not isinstance(restaurant_ids, list):
+            return Response({
+                'error': 'restaurant_ids must be a list of integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            restaurant_ids = list(dict.fromkeys(int(restaurant_id) for restaurant_id in restaurant_ids))
+        except (TypeError, ValueError):
+            return Response({
+                'error': 'restaurant_ids must be a list of integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not restaurant_ids or len(restaurant_ids) > self.MAX_BATCH_SIZE:
+            return Response({
+                'error': f'restaurant_ids must contain between 1 and {self.MAX_BATCH_SIZE} ids'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        skip_state, done_label = self.ACTIONS[action]
+        approved = dict(
+            Restaurant.objects.filter(restaurant_id__in=restaurant_ids).values_list('restaurant_id', 'approved')
+        )
+
+        results = []
+        to_update = []
+        for restaurant_id in restaurant_ids:
+            if restaurant_id not in approved:
+                results.append({'restaurant_id': restaurant_id, 'status': 'not_found'})
+            elif (skip_state == 'approved' and approved[restaurant_id]) or \
+                    (skip_state == 'pending' and not approved[restaurant_id]):
+                results.append({'restaurant_id': restaurant_id, 'status': f'already_{skip_state}'})
+            else:
+                results.append({'restaurant_id': restaurant_id, 'status': done_label})
+                to_update.append(restaurant_id)
+
+        if to_update:
+            now = timezone.now()
+            restaurants = Restaurant.objects.filter(restaurant_id__in=to_update)
+            with transaction.atomic():
+                if action == 'approve':
+                    restaurants.update(approved=True, updated_at=now)
+                elif action == 'reject':
+                    restaurants.update(approved=False, updated_at=now)
+                else:
+                    restaurants.update(
+                        deleted_at=now,
+                        approved=False,
+                        deletion_progress={'status': 'queued'}
+                    )
+                    for restaurant_id in to_update:
+                        schedule_restaurant_purge(restaurant_id)
+            invalidate_restaurants(to_update)
+
+        return Response({
+            'action': action,
+            'updated': len(to_update),
+            'results': results
+        }, status=status.HTTP_200_OK)
+
+# View to get analytics dashboard, for the last month unless a range is given
 class AnalyticsDashboardView(APIView):
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request):
-        # Calculate date range for the last month
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=30)
-        
-        # Get all bookings in the last month
-        bookings = Booking.objects.filter(
-            booking_datetime__range=(start_date, end_date)
-        )
-        
+        # Calculate date range, defaulting to the last month
+        try:
+            end_date = parse_date_param(request.query_params.get('end')) or timezone.now().date()
+            start_date = parse_date_param(request.query_params.get('start')) or end_date - timedelta(days=30)
+        except ValueError:
+            return Response({
+                'error': 'Invalid date format. Use YYYY-MM-DD for start and end'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if start_date > end_date:
+            return Response({
+                'error': 'start must not be after end'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Bookings are read from the daily rollups rather than scanned
+        rollups = DailyBookingRollup.objects.filter(date__range=(start_date, end_date))
+
         # Calculate total bookings
-        total_bookings = bookings.count()
-        
+        total_bookings = rollups.aggregate(total=Sum('booking_count'))['total'] or 0
+
         # Get bookings by status
-        bookings_by_status = bookings.values('status').annotate(count=Count('booking_id'))
-        
-        # Get top restaurants by booking count
-        top_restaurants = Restaurant.objects.filter(
-            bookingslot__slot_id__in=bookings.values('slot_id')
-        ).annotate(
-            booking_count=Count('bookingslot__booking__booking_id')
-        ).order_by('-booking_count')[:5]
-        
+        bookings_by_status = rollups.values('status').annotate(count=Sum('booking_count')).order_by('status')
+
+        # Get top restaurants by bookings made in the range
+        top_restaurants = list(
+            rollups.values('restaurant_id', 'restaurant_id__name')
+            .annotate(booking_count=Sum('booking_count'))
+            .order_by('-booking_count')[:5]
+        )
+
+        # Average ratings for all top restaurants in one query
+        avg_ratings = dict(
+            Review.objects.filter(restaurant_id__in=[row['restaurant_id'] for row in top_restaurants])
+            .values_list('restaurant_id')
+            .annotate(avg_rating=Avg('rating'))
+        )
+
         # Format top restaurants data
         top_restaurants_data = []
-        for restaurant in top_restaurants:
+        for row in top_restaurants:
             top_restaurants_data.append({
-                'restaurant_id': restaurant.restaurant_id,
-                'name': restaurant.name,
-                'booking_count': restaurant.booking_count,
-                'avg_rating': Review.objects.filter(restaurant_id=restaurant).aggregate(Avg('rating'))['rating__avg'] or 0
+                'restaurant_id': row['restaurant_id'],
+                'name': row['restaurant_id__name'],
+                'booking_count': row['booking_count'],
+                'avg_rating': avg_ratings.get(row['restaurant_id']) or 0
             })
         
-        # Get new restaurants in the last month
+        # Get new restaurants in the range
         new_restaurants = Restaurant.objects.filter(
-            created_at__range=(start_date, end_date)
+            created_at__date__range=(start_date, end_date)
         ).count()
         
         # Get pending approval restaurants
@@ -126,4 +269,80 @@ class AnalyticsDashboardView(APIView):
                 'start': start_date,
                 'end': end_date
             }
-        }, status=status.HTTP_200_OK) 
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+# View to get bookings, cancellations, covers and new restaurants over time
+class AnalyticsTimeSeriesView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    def get(self, request):
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in BUCKETS:
+            return Response({
+                'error': f'bucket must be one of: {", ".join(BUCKETS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            end = parse_datetime_param(request.query_params.get('end'), end_of_day=True) or timezone.now()
+            start = parse_datetime_param(request.query_params.get('start')) or end - timedelta(days=30)
+            if start > end:
+                raise ValueError('start must not be after end')
+            starts = bucket_starts(start, end, bucket)
+        except ValueError as e:
+            return Response({
+                'error': f'Invalid range: {str(e)}. Use YYYY-MM-DD or ISO 8601 datetimes for start and end'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Whole buckets are always reported, so the bucket boundaries are the cache key,
+        # along with the global restaurant version so moderation and removals show up.
+        # Ranges that include the current bucket are still changing and expire quickly.
+        step = BUCKETS[bucket][1]
+        range_end = starts[-1] + step
+        cache_key = f"analytics:timeseries:v{global_version()}:{bucket}:{starts[0].isoformat()}:{range_end.isoformat()}"
+        data = cache.get(cache_key)
+        record_cache_lookup('analytics_timeseries', data is not None, data is None)
+        if data is None:
+            data = self.build(bucket, starts, range_end)
+            is_open = range_end > timezone.now()
+            cache.set(
+                cache_key, data,
+                settings.ANALYTICS_CACHE_TTL_OPEN if is_open else settings.ANALYTICS_CACHE_TTL_CLOSED
+            )
+
+        return Response(data, status=status.HTTP_200_OK)
+
+    def build(self, bucket, starts, range_end):
+        trunc = BUCKETS[bucket][0]
+
+        booking_rows = (
+            Booking.objects
+            .filter(booking_datetime__gte=starts[0], booking_datetime__lt=range_end)
+            .annotate(bucket=trunc('booking_datetime'))
+            .values('bucket')
+            .annotate(
+                bookings=Count('booking_id'),
+                cancellations=Count('booking_id', filter=Q(status='Cancelled')),
+                covers=Sum('number_of_people')
+            )
+            .order_by()
+        )
+        restaurant_rows = (
+            Restaurant.objects
+            .filter(created_at__gte=starts[0], created_at__lt=range_end)
+            .annotate(bucket=trunc('created_at'))
+            .values('bucket')
+            .annotate(new_restaurants=Count('restaurant_id'))
+            .order_by()
+        )
+
+        series = zero_filled(booking_rows, starts, bucket, ['bookings', 'cancellations', 'covers'])
+        series.update(zero_filled(restaurant_rows, starts, bucket, ['new_restaurants']))
+
+        return {
+            'bucket': bucket,
+            'start': starts[0],
+            'end': range_end,
+            'buckets': starts,
+            'series': series
+        }
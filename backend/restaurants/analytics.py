@@ -0,0 +1,90 @@
+"""
+Helpers for bucketed analytics queries.
+
+Rows are grouped in SQL with Trunc* functions, then spread into zero-filled
+column arrays (one list per metric, aligned with the list of bucket starts).
+"""
+
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+from django.utils.dateparse import parse_date, parse_datetime
+
+# Bucket name -> (SQL truncation function, bucket width)
+BUCKETS = {
+    'hour': (TruncHour, timedelta(hours=1)),
+    'day': (TruncDay, timedelta(days=1)),
+    'week': (TruncWeek, timedelta(weeks=1)),
+}
+
+# Upper bound on the number of buckets a single request may ask for
+MAX_BUCKETS = 2000
+
+
+def parse_datetime_param(value, end_of_day=False):
+    """
+    Parse a YYYY-MM-DD or ISO 8601 datetime query parameter as UTC.
+    A bare date means the start of that day, or its end with ``end_of_day``.
+    Raises ValueError for malformed input.
+    """
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed.astimezone(dt_timezone.utc)
+
+
+def floor_to_bucket(value, bucket):
+    """
+    Return the start of the bucket containing ``value`` (weeks start on Monday,
+    matching TruncWeek)
+    """
+    value = value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if bucket == 'hour':
+        return value
+    value = value.replace(hour=0)
+    if bucket == 'week':
+        value -= timedelta(days=value.weekday())
+    return value
+
+
+def bucket_starts(start, end, bucket):
+    """
+    Return the start of every bucket overlapping [start, end]
+    """
+    step = BUCKETS[bucket][1]
+    current = floor_to_bucket(start, bucket)
+    last = floor_to_bucket(end, bucket)
+    count = (last - current) // step + 1
+    if count > MAX_BUCKETS:
+        raise ValueError(f'Range spans {count} buckets, the maximum is {MAX_BUCKETS}')
+    return [current + step * index for index in range(count)]
+
+
+def zero_filled(rows, starts, bucket, fields):
+    """
+    Spread grouped rows ({'bucket': datetime, field: value, ...}) into one
+    list per field, with zeros for buckets that had no rows
+    """
+    step = BUCKETS[bucket][1]
+    origin = starts[0]
+    series = {field: [0] * len(starts) for field in fields}
+    for row in rows:
+        index = (row['bucket'] - origin) // step
+        if 0 <= index < len(starts):
+            for field in fields:
+                series[field][index] = row[field] or 0
+    return series
+
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else 0
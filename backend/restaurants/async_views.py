@@ -0,0 +1,76 @@
+"""
+Async variants of hot read endpoints, served without tying up a thread
+per request under ASGI. Responses match the DRF views they mirror.
+"""
+
+from django.db.models import Avg
+
+from backend.asyncapi import async_api_view, error_response, json_response
+from backend.background import run_in_database_thread
+from bookings.models import Review
+from .models import Restaurant, RestaurantHours, RestaurantPhoto
+
+
+def restaurant_detail_data(restaurant_id):
+    """
+    Return the RestaurantDetailView response body, or None if there is no such restaurant
+    """
+    restaurant = Restaurant.objects.filter(restaurant_id=restaurant_id, approved=True).first()
+    if restaurant is None:
+        return None
+
+    # Get restaurant photos
+    photos = list(RestaurantPhoto.objects.filter(restaurant_id=restaurant_id))
+
+    # Get average rating and reviews
+    reviews = Review.objects.filter(restaurant_id=restaurant_id)
+    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+    formatted_reviews = [
+        {
+            'review_id': review.review_id,
+            'rating': review.rating,
+            'comment': review.comment,
+            'created_at': review.created_at,
+            'customer_name': review.customer_id.username
+        }
+        for review in reviews.select_related('customer_id')
+    ]
+
+    # Get restaurant hours; the first entry gives the opening and closing times
+    restaurant_hours = list(RestaurantHours.objects.filter(restaurant_id=restaurant_id))
+    first_hour = restaurant_hours[0] if restaurant_hours else None
+
+    return {
+        'restaurant_id': restaurant.restaurant_id,
+        'name': restaurant.name,
+        'cuisine_type': restaurant.cuisine_type,
+        'cost_rating': restaurant.cost_rating,
+        'rating': round(avg_rating, 1),
+        'times_booked_today': restaurant.times_booked_today,
+        'address': restaurant.address,
+        'city': restaurant.city,
+        'state': restaurant.state,
+        'zip': restaurant.zip,
+        'latitude': restaurant.latitude,
+        'longitude': restaurant.longitude,
+        'photos': [photo.photo_url for photo in photos],
+        'photo_ids': [photo.photo_id for photo in photos],
+        'reviews': formatted_reviews,
+        'description': restaurant.description,
+        'contact_info': restaurant.contact_info,
+        'days_open': [hours.day_of_week for hours in restaurant_hours],
+        'opening_time': first_hour.open_time.strftime('%H:%M') if first_hour else '',
+        'closing_time': first_hour.close_time.strftime('%H:%M') if first_hour else '',
+        'approved': restaurant.approved
+    }
+
+
+@async_api_view()
+async def restaurant_detail_async(request, restaurant_id):
+    """
+    Async counterpart of RestaurantDetailView
+    """
+    data = await run_in_database_thread(restaurant_detail_data, restaurant_id)
+    if data is None:
+        return error_response('Restaurant not found', 404)
+    return json_response(data)
@@ -0,0 +1,64 @@
+"""
+Versioned cache keys for restaurant data.
+
+Cached restaurant payloads embed version numbers in their keys, so
+invalidating is a single write that makes the old entries unreachable -
+there is never a need to find and delete individual keys.
+
+* the global version covers aggregates over all restaurants (admin analytics)
+* per-restaurant versions cover single-restaurant payloads (detail, cards)
+"""
+
+import time
+
+from django.core.cache import cache
+
+GLOBAL_VERSION_KEY = 'restaurants:version'
+
+
+def restaurant_version_key(restaurant_id):
+    return f'restaurants:{restaurant_id}:version'
+
+
+def restaurant_cache_key(restaurant_id, version, part):
+    """
+    Key for one cached part of a restaurant's payload, e.g. 'detail' or 'reviews'
+    """
+    return f'restaurants:{restaurant_id}:v{version}:{part}'
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def global_version():
+    version = cache.get(GLOBAL_VERSION_KEY)
+    if version is None:
+        version = _new_version()
+        cache.add(GLOBAL_VERSION_KEY, version, timeout=None)
+    return version
+
+
+def restaurant_versions(restaurant_ids):
+    """
+    Return {restaurant_id: version} in a single cache round-trip
+    """
+    keys = {restaurant_version_key(restaurant_id): restaurant_id for restaurant_id in restaurant_ids}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update({keys[key]: version for key, version in missing.items()})
+    return versions
+
+
+def invalidate_restaurants(restaurant_ids=()):
+    """
+    Invalidate cached data for a batch of restaurants with two cache writes,
+    however many restaurants are in the batch
+    """
+    version = _new_version()
+    if restaurant_ids:
+        cache.set_many({restaurant_version_key(restaurant_id): version for restaurant_id in restaurant_ids}, timeout=None)
+    cache.set(GLOBAL_VERSION_KEY, version, timeout=None)
@@ -0,0 +1,55 @@
+"""
+Pure image resizing helpers.
+
+This module runs inside process-pool workers, so it must only depend on Pillow
+and the standard library - importing Django models here would fail in a
+freshly spawned worker. Pillow itself is imported on first use, so web
+workers that only read THUMBNAIL_* never load it.
+"""
+
+import io
+
+# Widths (in pixels) of the responsive variants generated for every photo
+VARIANT_WIDTHS = (320, 640, 1280)
+
+# Output formats and the Pillow options used to encode them
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Variant returned to list pages in place of the full-size original
+THUMBNAIL_WIDTH = 640
+THUMBNAIL_FORMAT = 'webp'
+
+
+def render_variants(image_bytes, widths=VARIANT_WIDTHS):
+    """
+    Resize an encoded image to each requested width in every variant format.
+
+    Images are never upscaled: widths larger than the original are skipped,
+    and an original narrower than every width is re-encoded at its own size.
+    Returns a list of ``(width, format, content_type, data)`` tuples.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(image_bytes)) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    target_widths = [width for width in widths if width < image.width] or [image.width]
+
+    variants = []
+    for width in target_widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt, (pil_format, content_type, options) in VARIANT_FORMATS.items():
+            frame = resized
+            if pil_format == 'JPEG' and frame.mode not in ('RGB', 'L'):
+                frame = frame.convert('RGB')
+            elif frame.mode not in ('RGB', 'RGBA', 'L'):
+                frame = frame.convert('RGBA')
+            buffer = io.BytesIO()
+            frame.save(buffer, format=pil_format, **options)
+            variants.append((width, fmt, content_type, buffer.getvalue()))
+    return variants
@@ -0,0 +1,38 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from backend.background import run_in_background
+from restaurants.models import RestaurantPhoto
+from restaurants.tasks import build_photo_variants
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and responsive variants for restaurant photos that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', type=int, help='Only process photos of this restaurant')
+        parser.add_argument('--all', action='store_true', help='Rebuild variants even for photos that already have them')
+
+    def handle(self, *args, **options):
+        photos = RestaurantPhoto.objects.all()
+        if options['restaurant']:
+            photos = photos.filter(restaurant_id=options['restaurant'])
+        if not options['all']:
+            photos = photos.filter(thumbnail_url__isnull=True)
+
+        photo_ids = list(photos.values_list('photo_id', flat=True))
+        self.stdout.write(f"Building variants for {len(photo_ids)} photos")
+
+        # Downloads and uploads overlap on the thread pool while resizing
+        # is spread across the process pool
+        futures = {run_in_background(build_photo_variants, photo_id): photo_id for photo_id in photo_ids}
+        failed = 0
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Photo {futures[future]} failed: {str(e)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(photo_ids) - failed} photos, {failed} failed"))
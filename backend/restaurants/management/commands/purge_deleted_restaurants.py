@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from restaurants.models import Restaurant
+from restaurants.tasks import purge_restaurant
+
+
+class Command(BaseCommand):
+    help = 'Purge removed restaurants whose background purge did not finish (e.g. after a restart)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help='Rows deleted per batch')
+
+    def handle(self, *args, **options):
+        restaurant_ids = list(
+            Restaurant.all_objects.filter(deleted_at__isnull=False).values_list('restaurant_id', flat=True)
+        )
+        for restaurant_id in restaurant_ids:
+            self.stdout.write(f"Purging restaurant {restaurant_id}")
+            purge_restaurant(restaurant_id, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {len(restaurant_ids)} restaurants"))
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurantphoto',
+            name='thumbnail_url',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurantphoto',
+            name='variants',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-19 01:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0003_restaurantphoto_variants'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='restaurantphoto',
+            options={'ordering': ['position', 'photo_id']},
+        ),
+        migrations.AddField(
+            model_name='restaurantphoto',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurantphoto',
+            name='position',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='restaurantphoto',
+            index=models.Index(fields=['restaurant_id', 'content_hash'], name='restaurants_restaur_40c492_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0004_restaurantphoto_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurant',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='restaurant',
+            name='deletion_progress',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,6 +1,13 @@
 from django.db import models
 from users.models import User
 
+class ActiveRestaurantManager(models.Manager):
+    """
+    Hides restaurants that were removed and are waiting to be purged
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 class Restaurant(models.Model):
     restaurant_id = models.AutoField(primary_key=True)
     manager_id = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -19,6 +26,12 @@ class Restaurant(models.Model):
     approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set when an admin removes the restaurant; dependents are purged in the background
+    deleted_at = models.DateTimeField(blank=True, null=True)
+    deletion_progress = models.JSONField(default=dict, blank=True)
+
+    objects = ActiveRestaurantManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.name
@@ -38,7 +51,19 @@ class RestaurantPhoto(models.Model):
     restaurant_id = models.ForeignKey(Restaurant, on_delete=models.CASCADE)
     photo_url = models.CharField(max_length=255)
     caption = models.CharField(max_length=255, blank=True, null=True)
+    # Resized copies generated in the background, see restaurants.tasks
+    thumbnail_url = models.CharField(max_length=255, blank=True, null=True)
+    variants = models.JSONField(default=list, blank=True)
+    # SHA-256 of the uploaded bytes, used to skip re-uploading identical photos
+    content_hash = models.CharField(max_length=64, blank=True, null=True)
+    position = models.IntegerField(default=0)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ['position', 'photo_id']
+        indexes = [
+            models.Index(fields=['restaurant_id', 'content_hash']),
+        ]
+
     def __str__(self):
         return f"Photo for {self.restaurant_id.name}"
\ No newline at end of file
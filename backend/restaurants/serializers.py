@@ -1,51 +1,21 @@
 from rest_framework import serializers
 from .models import Restaurant, RestaurantHours, RestaurantPhoto
-import boto3
 from django.conf import settings
-import uuid
+from django.db import transaction
 from datetime import datetime, timedelta
-import os
+import hashlib
+from .cache import invalidate_restaurants
+from .storage import get_s3_client, upload_to_s3
+from .tasks import photo_object_urls, schedule_photo_cleanup, schedule_photo_variants
 
-def upload_to_s3(image_file, folder_name):
+def read_upload(image_file):
     """
-    Upload a file to S3 bucket with proper naming convention
-    Returns the URL of the uploaded file
+    Read an uploaded file and rewind it for the S3 upload
+    Returns the raw bytes and their SHA-256 hex digest
     """
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.AWS_S3_REGION_NAME
-    )
-    # Generate a unique filename
-    file_extension = os.path.splitext(image_file.name)[1]
-    unique_id = str(uuid.uuid4())
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"{folder_name}/{timestamp}_{unique_id}{file_extension}"
-
-    # Create an empty folder marker in S3
-    try:
-        s3_client.put_object(
-            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-            Key=f"{folder_name}/",
-            Body=''
-        )
-    except Exception as e:
-        print(f"Error creating folder marker: {str(e)}")
-
-    # Upload the file
-    s3_client.upload_fileobj(
-        image_file,
-        settings.AWS_STORAGE_BUCKET_NAME,
-        filename,
-        ExtraArgs={
-            'ContentType': image_file.content_type
-        }
-    )
-
-    # Generate the URL
-    url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{filename}"
-    return url
+    image_bytes = image_file.read()
+    image_file.seek(0)
+    return image_bytes, hashlib.sha256(image_bytes).hexdigest()
 
 class RestaurantSerializer(serializers.ModelSerializer):
     class Meta:
@@ -67,8 +37,8 @@ class RestaurantHoursSerializer(serializers.ModelSerializer):
 class RestaurantPhotoSerializer(serializers.ModelSerializer):
     class Meta:
         model = RestaurantPhoto
-        fields = ['photo_id', 'restaurant_id', 'photo_url', 'caption', 'uploaded_at']
-        read_only_fields = ['photo_id', 'uploaded_at']
+        fields = ['photo_id', 'restaurant_id', 'photo_url', 'thumbnail_url', 'variants', 'caption', 'uploaded_at']
+        read_only_fields = ['photo_id', 'thumbnail_url', 'variants', 'uploaded_at']
 
 class RestaurantFullSerializer(serializers.ModelSerializer):
     days_open = serializers.ListField(child=serializers.CharField(), write_only=True)
@@ -79,6 +49,14 @@ class RestaurantFullSerializer(serializers.ModelSerializer):
         write_only=True,
         required=False
     )
+    # Incremental photo edits: append new photos, remove or reorder existing ones by photo_id
+    add_photos = serializers.ListField(
+        child=serializers.ImageField(max_length=1000000, allow_empty_file=False, use_url=False),
+        write_only=True,
+        required=False
+    )
+    remove_photo_ids = serializers.ListField(child=serializers.IntegerField(), write_only=True, required=False)
+    photo_order = serializers.ListField(child=serializers.IntegerField(), write_only=True, required=False)
     table_sizes = serializers.ListField(child=serializers.IntegerField(), write_only=True, required=False)
     available_booking_times = serializers.ListField(child=serializers.TimeField(), write_only=True, required=False)
     location_lat = serializers.FloatField(write_only=True, required=False)
@@ -95,7 +73,8 @@ class RestaurantFullSerializer(serializers.ModelSerializer):
         fields = [
             'restaurant_id', 'manager_id', 'name', 'cuisine_type', 'cost_rating', 
             'description', 'address', 'contact_info', 'days_open', 'opening_time', 
-            'closing_time', 'photos', 'table_sizes', 'available_booking_times', 
+            'closing_time', 'photos', 'add_photos', 'remove_photo_ids', 'photo_order',
+            'table_sizes', 'available_booking_times', 
             'location_lat', 'location_lng', 'city', 'state', 'zipcode', 'location_data', 'approved', 
             'restaurant_photos', 'operating_hours', 'available_slots'
         ]
@@ -103,7 +82,12 @@ class RestaurantFullSerializer(serializers.ModelSerializer):
 
     def get_restaurant_photos(self, obj):
         photos = RestaurantPhoto.objects.filter(restaurant_id=obj)
-        return [{'photo_url': photo.photo_url, 'caption': photo.caption} for photo in photos]
+        return [{
+            'photo_id': photo.photo_id,
+            'photo_url': photo.photo_url,
+            'thumbnail_url': photo.thumbnail_url,
+            'caption': photo.caption
+        } for photo in photos]
 
     def get_operating_hours(self, obj):
         hours = RestaurantHours.objects.filter(restaurant_id=obj)
@@ -142,12 +126,14 @@ class RestaurantFullSerializer(serializers.ModelSerializer):
         days_open = validated_data.pop('days_open')
         opening_time = validated_data.pop('opening_time')
         closing_time = validated_data.pop('closing_time')
-        photos = validated_data.pop('photos', [])
+        photos = validated_data.pop('photos', []) + validated_data.pop('add_photos', [])
         location_lat = validated_data.pop('location_lat', None)
         location_lng = validated_data.pop('location_lng', None)
         # Remove fields that don't exist in the model
         validated_data.pop('table_sizes', None)
         validated_data.pop('available_booking_times', None)
+        validated_data.pop('remove_photo_ids', None)
+        validated_data.pop('photo_order', None)
         
         # Set location data if provided
         if location_lat is not None and location_lng is not None:
@@ -173,12 +159,7 @@ class RestaurantFullSerializer(serializers.ModelSerializer):
             photos_folder = f'{base_folder}/photos'
             
             # Create folder structure in S3
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
+            s3_client = get_s3_client()
             
             try:
                 # Create base restaurant folder
@@ -196,13 +177,22 @@ class RestaurantFullSerializer(serializers.ModelSerializer):
             except Exception as e:
                 print(f"Error creating S3 folders: {str(e)}")
 
-            # Upload photos after folder structure is created
+            # Upload photos after folder structure is created, skipping duplicate files
+            uploaded_hashes = set()
             for photo in photos:
-                photo_url = upload_to_s3(photo, photos_folder)
-                RestaurantPhoto.objects.create(
+                image_bytes, content_hash = read_upload(photo)
+                if content_hash in uploaded_hashes:
+                    continue
+                uploaded_hashes.add(content_hash)
+                photo_url = upload_to_s3(photo, photos_folder, create_folder_marker=False)
+                restaurant_photo = RestaurantPhoto.objects.create(
                     restaurant_id=restaurant,
-                    photo_url=photo_url
+                    photo_url=photo_url,
+                    content_hash=content_hash,
+                    position=len(uploaded_hashes) - 1
                 )
+                # Thumbnails and responsive variants are built off the request thread
+                schedule_photo_variants(restaurant_photo.photo_id, image_bytes)
 
         return restaurant
 
@@ -212,6 +202,9 @@ class RestaurantFullSerializer(serializers.ModelSerializer):
         opening_time = validated_data.pop('opening_time', None)
         closing_time = validated_data.pop('closing_time', None)
         photos = validated_data.pop('photos', None)
+        add_photos = validated_data.pop('add_photos', [])
+        remove_photo_ids = validated_data.pop('remove_photo_ids', [])
+        photo_order = validated_data.pop('photo_order', None)
         location_lat = validated_data.pop('location_lat', None)
         location_lng = validated_data.pop('location_lng', None)
         # Remove fields that don't exist in the model
@@ -243,34 +236,76 @@ class RestaurantFullSerializer(serializers.ModelSerializer):
                 )
 
         # Update photos if provided
+        if photos is not None or add_photos or remove_photo_ids or photo_order is not None:
+            self.update_photos(instance, photos, add_photos, remove_photo_ids, photo_order)
+
+        # Cached pages for this restaurant are now stale
+        invalidate_restaurants([instance.restaurant_id])
+
+        return instance
+
+    def update_photos(self, instance, photos, add_photos, remove_photo_ids, photo_order):
+        """
+        Apply photo changes without touching photos that stay the same.
+
+        ``photos`` keeps its original meaning of "the full photo set": stored
+        photos whose bytes match an uploaded file are kept as they are, the rest
+        are removed. ``add_photos``, ``remove_photo_ids`` and ``photo_order``
+        are incremental edits keyed by photo_id. Files whose bytes are already
+        stored are never uploaded again, and removed objects are deleted from
+        S3 in the background.
+        """
+        existing = list(RestaurantPhoto.objects.filter(restaurant_id=instance).only(
+            'photo_id', 'photo_url', 'variants', 'content_hash', 'position'
+        ))
+        remove_ids = set(remove_photo_ids)
+
+        uploads = [(photo, *read_upload(photo)) for photo in add_photos]
         if photos is not None:
-            # Delete existing photos
-            RestaurantPhoto.objects.filter(restaurant_id=instance).delete()
-            
-            # Create photos folder if it doesn't exist
-            photos_folder = f'restaurants/{instance.restaurant_id}/photos'
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
-            
-            try:
-                s3_client.put_object(
-                    Bucket=settings.AWS_STORAGE_BUCKET_NAME,
-                    Key=f"{photos_folder}/",
-                    Body=''
-                )
-            except Exception as e:
-                print(f"Error creating S3 photos folder: {str(e)}")
+            full_set = [(photo, *read_upload(photo)) for photo in photos]
+            wanted_hashes = {content_hash for _, _, content_hash in full_set}
+            remove_ids.update(p.photo_id for p in existing if p.content_hash not in wanted_hashes)
+            uploads = full_set + uploads
 
-            # Upload new photos to S3 and create restaurant photos
-            for photo in photos:
-                photo_url = upload_to_s3(photo, photos_folder)
-                RestaurantPhoto.objects.create(
-                    restaurant_id=instance,
-                    photo_url=photo_url
-                )
+        kept = [p for p in existing if p.photo_id not in remove_ids]
+        removed = [p for p in existing if p.photo_id in remove_ids]
+
+        # Final order: explicitly ordered photos first, then the remaining kept ones
+        if photo_order is not None:
+            rank = {photo_id: index for index, photo_id in enumerate(photo_order)}
+            kept.sort(key=lambda p: (rank.get(p.photo_id, len(rank)), p.position, p.photo_id))
+
+        photos_folder = f'restaurants/{instance.restaurant_id}/photos'
+        stored_hashes = {p.content_hash for p in kept if p.content_hash}
+        new_photos = []
+        for photo, image_bytes, content_hash in uploads:
+            if content_hash in stored_hashes:
+                continue
+            stored_hashes.add(content_hash)
+            photo_url = upload_to_s3(photo, photos_folder, create_folder_marker=False)
+            new_photos.append((RestaurantPhoto(
+                restaurant_id=instance,
+                photo_url=photo_url,
+                content_hash=content_hash
+            ), image_bytes))
+
+        changed = []
+        for index, photo in enumerate(kept):
+            if photo.position != index:
+                photo.position = index
+                changed.append(photo)
+        for index, (photo, _) in enumerate(new_photos, start=len(kept)):
+            photo.position = index
+
+        with transaction.atomic():
+            if removed:
+                RestaurantPhoto.objects.filter(photo_id__in=[p.photo_id for p in removed]).delete()
+            if changed:
+                RestaurantPhoto.objects.bulk_update(changed, ['position'])
+            if new_photos:
+                RestaurantPhoto.objects.bulk_create([photo for photo, _ in new_photos])
 
-        return instance
\ No newline at end of file
+            # Thumbnails and responsive variants are built off the request thread
+            for photo, image_bytes in new_photos:
+                schedule_photo_variants(photo.photo_id, image_bytes)
+            schedule_photo_cleanup(url for photo in removed for url in photo_object_urls(photo))
@@ -0,0 +1,106 @@
+from django.conf import settings
+import uuid
+from datetime import datetime
+import os
+
+
+def get_s3_client():
+    # boto3 takes longer to import than the rest of the app; only the
+    # requests that touch S3 should pay for it
+    import boto3
+
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_S3_REGION_NAME
+    )
+
+
+def s3_url(key):
+    """
+    Return the public URL for an object key in the storage bucket
+    """
+    return f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{key}"
+
+
+def s3_key_from_url(url):
+    """
+    Return the object key for a URL produced by ``s3_url``
+    """
+    prefix = s3_url('')
+    return url[len(prefix):] if url.startswith(prefix) else None
+
+
+def upload_to_s3(image_file, folder_name, create_folder_marker=True):
+    """
+    Upload a file to S3 bucket with proper naming convention
+    Returns the URL of the uploaded file
+    """
+    s3_client = get_s3_client()
+    # Generate a unique filename
+    file_extension = os.path.splitext(image_file.name)[1]
+    unique_id = str(uuid.uuid4())
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"{folder_name}/{timestamp}_{unique_id}{file_extension}"
+
+    # Create an empty folder marker in S3
+    if create_folder_marker:
+        try:
+            s3_client.put_object(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Key=f"{folder_name}/",
+                Body=''
+            )
+        except Exception as e:
+            print(f"Error creating folder marker: {str(e)}")
+
+    # Upload the file
+    s3_client.upload_fileobj(
+        image_file,
+        settings.AWS_STORAGE_BUCKET_NAME,
+        filename,
+        ExtraArgs={
+            'ContentType': image_file.content_type
+        }
+    )
+
+    return s3_url(filename)
+
+
+def upload_bytes_to_s3(data, key, content_type, s3_client=None):
+    """
+    Upload raw bytes under an explicit key
+    Returns the URL of the uploaded object
+    """
+    s3_client = s3_client or get_s3_client()
+    s3_client.put_object(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+        Key=key,
+        Body=data,
+        ContentType=content_type,
+        CacheControl='public, max-age=31536000, immutable'
+    )
+    return s3_url(key)
+
+
+def download_from_s3(key, s3_client=None):
+    """
+    Return the raw bytes of an object in the storage bucket
+    """
+    s3_client = s3_client or get_s3_client()
+    response = s3_client.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+    return response['Body'].read()
+
+
+def delete_from_s3(keys, s3_client=None):
+    """
+    Delete objects from the storage bucket in batches of 1000 (the S3 limit)
+    """
+    s3_client = s3_client or get_s3_client()
+    keys = list(keys)
+    for start in range(0, len(keys), 1000):
+        s3_client.delete_objects(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Delete={'Objects': [{'Key': key} for key in keys[start:start + 1000]], 'Quiet': True}
+        )
@@ -0,0 +1,240 @@
+"""
+Background jobs for the restaurants app.
+"""
+
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from backend.background import get_process_pool, run_in_background
+from .cache import invalidate_restaurants
+from .image_variants import THUMBNAIL_FORMAT, THUMBNAIL_WIDTH, render_variants
+from .models import Restaurant, RestaurantPhoto
+from .storage import delete_from_s3, download_from_s3, get_s3_client, s3_key_from_url, upload_bytes_to_s3
+
+logger = logging.getLogger('restaurants')
+
+
+def variant_key(original_key, width, fmt):
+    """
+    Return the key a variant is stored under, next to its original
+    e.g. restaurants/1/photos/a.jpg -> restaurants/1/photos/variants/a_w640.webp
+    """
+    folder, filename = os.path.split(original_key)
+    stem = os.path.splitext(filename)[0]
+    return f"{folder}/variants/{stem}_w{width}.{fmt}"
+
+
+def build_photo_variants(photo_id, image_bytes=None):
+    """
+    Generate, upload and record the responsive variants of one photo.
+
+    Resizing runs in the process pool; this function only waits on it and
+    performs the S3 uploads and the final row update.
+    """
+    photo = RestaurantPhoto.objects.filter(photo_id=photo_id).only('photo_id', 'photo_url', 'restaurant_id').first()
+    if photo is None:
+        return None
+
+    original_key = s3_key_from_url(photo.photo_url)
+    if original_key is None:
+        logger.warning(f"Photo {photo_id} is not stored in the bucket, skipping variants")
+        return None
+
+    s3_client = get_s3_client()
+    if image_bytes is None:
+        image_bytes = download_from_s3(original_key, s3_client=s3_client)
+
+    rendered = get_process_pool().submit(render_variants, image_bytes).result()
+
+    variants = []
+    thumbnail_url = None
+    for width, fmt, content_type, data in rendered:
+        url = upload_bytes_to_s3(data, variant_key(original_key, width, fmt), content_type, s3_client=s3_client)
+        variants.append({'width': width, 'format': fmt, 'url': url})
+        if fmt == THUMBNAIL_FORMAT and (thumbnail_url is None or width <= THUMBNAIL_WIDTH):
+            thumbnail_url = url
+
+    updated = RestaurantPhoto.objects.filter(photo_id=photo_id).update(
+        variants=variants,
+        thumbnail_url=thumbnail_url
+    )
+    if not updated:
+        # The photo was removed while its variants were being built
+        delete_photo_objects([variant['url'] for variant in variants])
+        return None
+    invalidate_restaurants([photo.restaurant_id_id])
+    logger.info(f"Generated {len(variants)} variants for photo {photo_id}")
+    return variants
+
+
+def schedule_photo_variants(photo_id, image_bytes=None):
+    """
+    Queue variant generation once the photo row is committed
+    """
+    transaction.on_commit(lambda: run_in_background(build_photo_variants, photo_id, image_bytes))
+
+
+def photo_object_urls(photo):
+    """
+    Return the URLs of every stored object belonging to a photo
+    """
+    return [photo.photo_url] + [variant['url'] for variant in photo.variants or []]
+
+
+def delete_photo_objects(urls):
+    """
+    Remove orphaned photo objects (originals and variants) from the bucket
+    """
+    keys = [key for key in (s3_key_from_url(url) for url in urls) if key]
+    if keys:
+        delete_from_s3(keys)
+        logger.info(f"Deleted {len(keys)} orphaned photo objects")
+
+
+def schedule_photo_cleanup(urls):
+    """
+    Queue deletion of stored objects once the rows referencing them are gone
+    """
+    urls = list(urls)
+    if urls:
+        transaction.on_commit(lambda: run_in_background(delete_photo_objects, urls))
+
+
+def cascade_plan(model, lookup=''):
+    """
+    Return (model, lookup back to ``model``, field) for every model that
+    depends on it, children before parents. ``field`` is None for rows that
+    cascade and must be deleted, or the name of a SET_NULL foreign key to
+    clear before its target rows go. This covers everything Django's
+    collector would delete or update; other on_delete handlers are skipped.
+    """
+    plan = []
+    for relation in model._meta.related_objects:
+        path = f"{relation.field.name}__{lookup}" if lookup else relation.field.name
+        if relation.on_delete is models.SET_NULL:
+            plan.append((relation.related_model, path, relation.field.name))
+        elif relation.on_delete is models.CASCADE:
+            plan.extend(cascade_plan(relation.related_model, path))
+            plan.append((relation.related_model, path, None))
+    return plan
+
+
+def delete_in_chunks(model, filters, chunk_size):
+    """
+    Delete matching rows with raw ``DELETE ... WHERE pk IN (...)`` batches,
+    one short transaction per batch. Yields the size of each deleted batch.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    pk_column = quote(model._meta.pk.column)
+    while True:
+        ids = list(model._base_manager.filter(**filters).values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        if model is RestaurantPhoto:
+            # Stored originals and variants go with their rows
+            photos = RestaurantPhoto.objects.filter(pk__in=ids).only('photo_url', 'variants')
+            delete_photo_objects([url for photo in photos for url in photo_object_urls(photo)])
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE {pk_column} IN ({', '.join(['%s'] * len(ids))})", ids)
+        yield len(ids)
+
+
+def clear_in_chunks(model, field, filters, chunk_size):
+    """
+    Set the foreign key ``field`` to NULL on matching rows in batches, one
+    short transaction per batch. Cleared rows stop matching ``filters``, so
+    each batch picks up where the last one left off. Yields each batch size.
+    """
+    while True:
+        ids = list(model._base_manager.filter(**filters).values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        with transaction.atomic():
+            model._base_manager.filter(pk__in=ids).update(**{field: None})
+        yield len(ids)
+
+
+def purge_status_key(restaurant_id):
+    return f"restaurant:{restaurant_id}:purge"
+
+
+def finished_purge(restaurant_id):
+    """
+    Return the final progress record of a recently completed purge, or None
+    """
+    return cache.get(purge_status_key(restaurant_id))
+
+
+def purge_restaurant(restaurant_id, chunk_size=None):
+    """
+    Delete a soft-deleted restaurant and everything that depends on it in
+    bounded chunks, recording progress on the restaurant row as it goes.
+    The row itself goes last, so the final 'done' record is kept in the cache
+    for RESTAURANT_PURGE_DONE_TTL. If a step raises, the progress is marked
+    'failed' and the row is left for the purge to be run again.
+    """
+    chunk_size = chunk_size or settings.RESTAURANT_PURGE_CHUNK_SIZE
+    restaurants = Restaurant.all_objects.filter(restaurant_id=restaurant_id, deleted_at__isnull=False)
+    if not restaurants.exists():
+        return
+
+    deleted = {}
+    cleared = {}
+    started_at = timezone.now().isoformat()
+    try:
+        for model, lookup, field in cascade_plan(Restaurant):
+            label = model._meta.label_lower
+            if field is None:
+                batches, totals = delete_in_chunks(model, {lookup: restaurant_id}, chunk_size), deleted
+            else:
+                batches, totals = clear_in_chunks(model, field, {lookup: restaurant_id}, chunk_size), cleared
+            for count in batches:
+                totals[label] = totals.get(label, 0) + count
+                restaurants.update(deletion_progress={
+                    'status': 'running',
+                    'started_at': started_at,
+                    'current': label,
+                    'deleted': deleted,
+                    'cleared': cleared
+                })
+                # Leave room for other transactions between batches
+                time.sleep(settings.RESTAURANT_PURGE_CHUNK_PAUSE)
+
+        restaurants.delete()
+    except Exception as e:
+        # Whatever was deleted stays deleted; the restaurant row is still
+        # there, so the failure shows up in its progress record
+        restaurants.update(deletion_progress={
+            'status': 'failed',
+            'started_at': started_at,
+            'failed_at': timezone.now().isoformat(),
+            'error': str(e),
+            'deleted': deleted,
+            'cleared': cleared
+        })
+        raise
+
+    # The purged bookings drop out of past analytics buckets
+    invalidate_restaurants([restaurant_id])
+    cache.set(purge_status_key(restaurant_id), {
+        'status': 'done',
+        'started_at': started_at,
+        'finished_at': timezone.now().isoformat(),
+        'deleted': deleted,
+        'cleared': cleared
+    }, timeout=settings.RESTAURANT_PURGE_DONE_TTL)
+    logger.info(f"Purged restaurant {restaurant_id}: {deleted}")
+
+
+def schedule_restaurant_purge(restaurant_id):
+    """
+    Queue the purge of a soft-deleted restaurant once the removal is committed
+    """
+    transaction.on_commit(lambda: run_in_background(purge_restaurant, restaurant_id))
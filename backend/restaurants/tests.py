@@ -1,3 +1,101 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from bookings.models import Booking, BookingSlot, DailyBookingRollup, WaitlistEntry
+from bookings.reservations import cancel_booking, reserve_table
+from bookings.waitlist import join_waitlist
+from users.models import User
+from users.token import create_jwt_pair_for_user
+from .models import Restaurant
+from .tasks import finished_purge, purge_restaurant
+
+
+@override_settings(RESTAURANT_PURGE_CHUNK_PAUSE=0)
+class PurgeRestaurantTests(TransactionTestCase):
+    # Each purge batch commits, so foreign keys are checked as it goes
+
+    def setUp(self):
+        manager = User.objects.create_user(email='manager@example.com', username='manager', password='pw', role='RestaurantManager')
+        first = User.objects.create_user(email='first@example.com', username='first', password='pw', role='Customer')
+        second = User.objects.create_user(email='second@example.com', username='second', password='pw', role='Customer')
+        self.restaurant = Restaurant.objects.create(manager_id=manager, name='Test', address='1 Main St', city='San Jose', approved=True)
+        slot = BookingSlot.objects.create(
+            restaurant_id=self.restaurant,
+            slot_datetime=timezone.now() + timedelta(days=1),
+            table_size=4,
+            total_tables=1
+        )
+        booking = reserve_table(first, slot, 2)
+        join_waitlist(second, slot.slot_id, 2)
+        with mock.patch('bookings.waitlist.queue_booking_confirmation_email'):
+            # Promotes the second customer
+            cancel_booking(booking)
+        Restaurant.objects.filter(restaurant_id=self.restaurant.restaurant_id).update(deleted_at=timezone.now())
+
+    def test_purge_clears_promoted_waitlist_entries_before_their_bookings(self):
+        self.assertTrue(WaitlistEntry.objects.filter(status='Promoted', booking_id__isnull=False).exists())
+
+        purge_restaurant(self.restaurant.restaurant_id, chunk_size=1)
+
+        self.assertFalse(Restaurant.all_objects.exists())
+        self.assertFalse(BookingSlot.objects.exists())
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+        self.assertFalse(DailyBookingRollup.objects.exists())
+        progress = finished_purge(self.restaurant.restaurant_id)
+        self.assertEqual(progress['status'], 'done')
+        self.assertEqual(progress['deleted']['bookings.booking'], 2)
+        self.assertEqual(progress['cleared'], {'bookings.waitlistentry': 1})
+
+    def test_failed_purge_is_recorded(self):
+        with mock.patch('restaurants.tasks.delete_in_chunks', side_effect=RuntimeError('database went away')):
+            with self.assertRaises(RuntimeError):
+                purge_restaurant(self.restaurant.restaurant_id)
+
+        progress = Restaurant.all_objects.get().deletion_progress
+        self.assertEqual(progress['status'], 'failed')
+        self.assertEqual(progress['error'], 'database went away')
+        self.assertTrue(Booking.objects.exists())
+
+
+
+class AnalyticsTimeSeriesCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(email='admin@example.com', username='admin', password='pw', role='Admin')
+        manager = User.objects.create_user(email='manager@example.com', username='manager', password='pw', role='RestaurantManager')
+        customer = User.objects.create_user(email='customer@example.com', username='customer', password='pw', role='Customer')
+        restaurant = Restaurant.objects.create(manager_id=manager, name='Test', address='1 Main St', city='San Jose', approved=True)
+        slot = BookingSlot.objects.create(
+            restaurant_id=restaurant,
+            slot_datetime=timezone.now() + timedelta(days=1),
+            table_size=4,
+            total_tables=5
+        )
+        cls.booking = reserve_table(customer, slot, 2)
+        # Made two days ago, so the booking sits in a closed range
+        cls.made_on = timezone.now() - timedelta(days=2)
+        Booking.objects.filter(pk=cls.booking.pk).update(booking_datetime=cls.made_on)
+
+    def setUp(self):
+        cache.clear()
+
+    def cancellations(self):
+        day = self.made_on.strftime('%Y-%m-%d')
+        response = self.client.get(
+            f'/api/restaurants/admin/analytics/timeseries/?start={day}&end={day}',
+            HTTP_AUTHORIZATION=f"Bearer {create_jwt_pair_for_user(self.admin)['access']}"
+        )
+        return response.json()['series']['cancellations']
+
+    def test_cancelling_refreshes_cached_closed_ranges(self):
+        self.assertEqual(self.cancellations(), [0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_booking(self.booking)
+
+        self.assertEqual(self.cancellations(), [1])
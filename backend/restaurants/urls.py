@@ -2,27 +2,37 @@ from django.urls import path
 from .views import (
     RestaurantCreateView, RestaurantListView, RestaurantDetailView,
     RestaurantSearchView, RestaurantTimeSlotsView, ManagerRestaurantsView,
-    RestaurantUpdateView, HotRestaurantsView
+    RestaurantUpdateView, HotRestaurantsView, ManagerAnalyticsView,
+    RestaurantTimeSlotsBatchView, RestaurantPageView, RestaurantCardsView
 )
+from .async_views import restaurant_detail_async
 from .admin_views import (
     UnapprovedRestaurantListView, ApprovedRestaurantListView,
-    ApproveRestaurantView, RemoveRestaurantView, AnalyticsDashboardView
+    ApproveRestaurantView, RemoveRestaurantView, AnalyticsDashboardView,
+    AnalyticsTimeSeriesView, BulkRestaurantModerationView
 )
 
 urlpatterns = [
     path('create/', RestaurantCreateView.as_view(), name='restaurant-create'),
     path('', RestaurantListView.as_view(), name='restaurant-list'),
     path('<int:restaurant_id>/', RestaurantDetailView.as_view(), name='restaurant-detail'),
+    path('<int:restaurant_id>/page/', RestaurantPageView.as_view(), name='restaurant-page'),
+    path('async/<int:restaurant_id>/', restaurant_detail_async, name='restaurant-detail-async'),
     path('update/', RestaurantUpdateView.as_view(), name='restaurant-update'),
     path('<int:restaurant_id>/time-slots/', RestaurantTimeSlotsView.as_view(), name='restaurant-time-slots'),
+    path('time-slots/batch/', RestaurantTimeSlotsBatchView.as_view(), name='restaurant-time-slots-batch'),
+    path('cards/', RestaurantCardsView.as_view(), name='restaurant-cards'),
     path('search/', RestaurantSearchView.as_view(), name='restaurant-search'),
     path('hot/', HotRestaurantsView.as_view(), name='hot-restaurants'),
     path('my-restaurants/', ManagerRestaurantsView.as_view(), name='manager-restaurants'),
+    path('my-restaurants/analytics/', ManagerAnalyticsView.as_view(), name='manager-analytics'),
     
     # Admin URLs
     path('admin/dashboard/', AnalyticsDashboardView.as_view(), name='admin-dashboard'),
+    path('admin/analytics/timeseries/', AnalyticsTimeSeriesView.as_view(), name='admin-analytics-timeseries'),
     path('admin/unapproved/', UnapprovedRestaurantListView.as_view(), name='admin-unapproved-restaurants'),
     path('admin/approved/', ApprovedRestaurantListView.as_view(), name='admin-approved-restaurants'),
     path('admin/approve/<int:restaurant_id>/', ApproveRestaurantView.as_view(), name='admin-approve-restaurant'),
     path('admin/remove/<int:restaurant_id>/', RemoveRestaurantView.as_view(), name='admin-remove-restaurant'),
+    path('admin/bulk/<str:action>/', BulkRestaurantModerationView.as_view(), name='admin-bulk-moderation'),
 ]
\ No newline at end of file
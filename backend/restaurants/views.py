@@ -7,12 +7,22 @@ from .serializers import RestaurantSerializer, RestaurantFullSerializer
 from users.models import User
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from users.authentication import ClaimsJWTAuthentication
 from bookings.models import BookingSlot, Booking, Review
-from django.db.models import Avg, Count
+from bookings.availability import open_slots, taken_tables_by_slot
+from django.db.models import Avg, Count, F, OuterRef, Prefetch, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
 from datetime import datetime, timedelta
 import pytz
 from rest_framework.exceptions import ValidationError
+from .analytics import DAY_NAMES, ratio
+from .cache import restaurant_cache_key, restaurant_versions
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from backend.log import HOT_PATH
+from backend.metrics import record_cache_lookup
 import logging
 
 # Get logger for restaurants app
@@ -27,7 +37,7 @@ class IsRestaurantManager(permissions.BasePermission):
 class RestaurantCreateView(generics.CreateAPIView):
     serializer_class = RestaurantFullSerializer
     permission_classes = [permissions.IsAuthenticated, IsRestaurantManager]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def perform_create(self, serializer):
         logger.info(f"Creating new restaurant for manager: {self.request.user.username}")
@@ -37,7 +47,7 @@ class RestaurantCreateView(generics.CreateAPIView):
 class RestaurantUpdateView(generics.UpdateAPIView):
     serializer_class = RestaurantFullSerializer
     permission_classes = [permissions.IsAuthenticated, IsRestaurantManager]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get_queryset(self):
         return Restaurant.objects.filter(manager_id=self.request.user)
@@ -54,18 +64,18 @@ class RestaurantListView(generics.ListAPIView):
     queryset = Restaurant.objects.all()
     serializer_class = RestaurantSerializer
     permission_classes = [AllowAny]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def list(self, request, *args, **kwargs):
-        logger.info("Listing all restaurants")
+        logger.info("Listing all restaurants", extra=HOT_PATH)
         return super().list(request, *args, **kwargs)
 
 class RestaurantTimeSlotsView(APIView):
     permission_classes = [AllowAny]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request, restaurant_id):
-        logger.info(f"Fetching time slots for restaurant {restaurant_id}")
+        logger.info("Fetching time slots for restaurant %s", restaurant_id, extra=HOT_PATH)
         # Get search parameters
         date_str = request.query_params.get('date')
         time_str = request.query_params.get('time')
@@ -97,76 +107,155 @@ class RestaurantTimeSlotsView(APIView):
                 'error': 'Restaurant not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Get day of week for the search date
-        day_of_week = search_datetime.strftime('%A')
+        # Candidate times are within 30 minutes either side of the search
+        start = search_datetime - timedelta(minutes=30)
+        end = search_datetime + timedelta(minutes=30)
+
+        # Get the restaurant's hours for every day the window touches
+        day_hours = {
+            day_of_week: (open_time, close_time)
+            for day_of_week, open_time, close_time in RestaurantHours.objects.filter(
+                restaurant_id=restaurant,
+                day_of_week__in={start.strftime('%A'), search_datetime.strftime('%A'), end.strftime('%A')}
+            ).values_list('day_of_week', 'open_time', 'close_time')
+        }
 
         # Check if restaurant is open
-        hours = RestaurantHours.objects.filter(
-            restaurant_id=restaurant,
-            day_of_week=day_of_week
-        ).first()
-        
+        day_of_week = search_datetime.strftime('%A')
+        hours = day_hours.get(day_of_week)
         if not hours:
             logger.warning(f"Restaurant {restaurant_id} is closed on {day_of_week}")
             return Response({
                 'error': 'Restaurant is closed on this day'
             }, status=status.HTTP_400_BAD_REQUEST)
-        
-        open_time = datetime.combine(search_datetime.date(), hours.open_time)
-        close_time = datetime.combine(search_datetime.date(), hours.close_time)
-        open_time = pytz.UTC.localize(open_time)
-        close_time = pytz.UTC.localize(close_time)
-        
-        if not (open_time <= search_datetime <= close_time):
+
+        if not (hours[0] <= search_datetime.time() <= hours[1]):
             logger.warning(f"Restaurant {restaurant_id} is not open at {search_datetime}")
             return Response({
                 'error': 'Restaurant is not open at this time'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get available time slots
-        time_slots = []
-        for minutes in range(-30, 31):  # -30 to +30 minutes in 30-minute intervals
-            slot_time = search_datetime + timedelta(minutes=minutes)
-            
-            # Check if slot is within restaurant hours
-            slot_hours = RestaurantHours.objects.filter(
+        # Get every slot in the window that fits the party, then count the
+        # taken tables of all of them at once
+        slots = list(
+            BookingSlot.objects.filter(
                 restaurant_id=restaurant,
-                day_of_week=slot_time.strftime('%A')
-            ).first()
-            
-            if slot_hours:
-                slot_open_time = datetime.combine(slot_time.date(), slot_hours.open_time)
-                slot_close_time = datetime.combine(slot_time.date(), slot_hours.close_time)
-                slot_open_time = pytz.UTC.localize(slot_open_time)
-                slot_close_time = pytz.UTC.localize(slot_close_time)
-                
-                if slot_open_time <= slot_time <= slot_close_time:
-                    # Check availability
-                    slot = BookingSlot.objects.filter(
-                        restaurant_id=restaurant,
-                        slot_datetime=slot_time,
-                        table_size__gte=num_people
-                    ).first()
-                    
-                    if slot:
-                        booked_tables = Booking.objects.filter(
-                            slot_id=slot,
-                            status='Booked'
-                        ).count()
-                        
-                        if booked_tables < slot.total_tables:
-                            time_slots.append({"time" : slot_time.strftime("%H:%M") , "id" : slot.slot_id})
-
-        logger.info(f"Found {len(time_slots)} available time slots for restaurant {restaurant_id}")
+                slot_datetime__range=(start, end),
+                table_size__gte=num_people
+            ).order_by('slot_datetime', 'slot_id').values_list('slot_id', 'slot_datetime', 'total_tables')
+        )
+        # Tables held by other customers during checkout count as taken
+        taken_tables = taken_tables_by_slot(
+            [slot_id for slot_id, _, _ in slots],
+            exclude_customer=request.user if request.user.is_authenticated else None
+        ) if slots else {}
+
+        # Keep slots within the restaurant's hours with a free table, one per time
+        available = {}
+        for slot_id, slot_datetime, total_tables in slots:
+            slot_hours = day_hours.get(slot_datetime.strftime('%A'))
+            if not slot_hours or not (slot_hours[0] <= slot_datetime.time() <= slot_hours[1]):
+                continue
+            if taken_tables.get(slot_id, 0) < total_tables:
+                available.setdefault(slot_datetime.strftime("%H:%M"), slot_id)
+        time_slots = [{"time": slot_time, "id": slot_id} for slot_time, slot_id in available.items()]
+
+        logger.info("Found %d available time slots for restaurant %s", len(time_slots), restaurant_id, extra=HOT_PATH)
         return Response({
             'restaurant_id': restaurant.restaurant_id,
             'name': restaurant.name,
             'available_time_slots': time_slots
         }, status=status.HTTP_200_OK)
 
+class RestaurantTimeSlotsBatchView(APIView):
+    """
+    POST {"restaurant_ids": [...], "date": "YYYY-MM-DD", "time": "HH:MM", "people": N}
+
+    Same answer as RestaurantTimeSlotsView for many restaurants at once,
+    from three queries whatever the number of restaurants.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    MAX_RESTAURANTS = 50
+    WINDOW = timedelta(minutes=30)
+
+    def post(self, request):
+        restaurant_ids = request.data.get('restaurant_ids')
+        date_str = request.data.get('date')
+        time_str = request.data.get('time')
+        num_people = request.data.get('people')
+
+        if not isinstance(restaurant_ids, list) or not restaurant_ids or not all([date_str, time_str, num_people]):
+            return Response({
+                'error': 'restaurant_ids (a list), date, time, and number of people are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            restaurant_ids = list(dict.fromkeys(int(restaurant_id) for restaurant_id in restaurant_ids))
+            search_datetime = pytz.UTC.localize(datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M"))
+            num_people = int(num_people)
+        except (TypeError, ValueError):
+            return Response({
+                'error': 'restaurant_ids must be integers. Use YYYY-MM-DD for date and HH:MM for time'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(restaurant_ids) > self.MAX_RESTAURANTS:
+            return Response({
+                'error': f'At most {self.MAX_RESTAURANTS} restaurants per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info("Fetching time slots for %d restaurants at %s", len(restaurant_ids), search_datetime, extra=HOT_PATH)
+        start = search_datetime - self.WINDOW
+        end = search_datetime + self.WINDOW
+
+        # Get restaurants and their hours for every day the window touches
+        names = dict(
+            Restaurant.objects.filter(restaurant_id__in=restaurant_ids, approved=True)
+            .values_list('restaurant_id', 'name')
+        )
+        hours = {
+            (restaurant_id, day_of_week): (open_time, close_time)
+            for restaurant_id, day_of_week, open_time, close_time in RestaurantHours.objects.filter(
+                restaurant_id__in=list(names),
+                day_of_week__in={start.strftime('%A'), end.strftime('%A')}
+            ).values_list('restaurant_id', 'day_of_week', 'open_time', 'close_time')
+        }
+
+        # Get every slot in the window with a free table, one per time
+        time_slots = {restaurant_id: {} for restaurant_id in names}
+        slots = open_slots(
+            list(names), start, end, num_people,
+            exclude_customer=request.user if request.user.is_authenticated else None
+        ).values_list('slot_id', 'restaurant_id', 'slot_datetime')
+        for slot_id, restaurant_id, slot_datetime in slots:
+            slot_hours = hours.get((restaurant_id, slot_datetime.strftime('%A')))
+            if not slot_hours or not (slot_hours[0] <= slot_datetime.time() <= slot_hours[1]):
+                continue
+            slot_time = slot_datetime.strftime("%H:%M")
+            time_slots[restaurant_id].setdefault(slot_time, slot_id)
+
+        return Response({
+            'date': date_str,
+            'time': time_str,
+            'people': num_people,
+            'restaurants': [
+                {
+                    'restaurant_id': restaurant_id,
+                    'name': names[restaurant_id],
+                    'available_time_slots': [
+                        {"time": slot_time, "id": slot_id}
+                        for slot_time, slot_id in time_slots[restaurant_id].items()
+                    ]
+                }
+                for restaurant_id in restaurant_ids
+                if restaurant_id in names
+            ]
+        }, status=status.HTTP_200_OK)
+
 class RestaurantDetailView(APIView):
     permission_classes = [AllowAny]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request, restaurant_id):
         # Get restaurant
@@ -180,6 +269,7 @@ class RestaurantDetailView(APIView):
         # Get restaurant photos
         photos = RestaurantPhoto.objects.filter(restaurant_id=restaurant)
         photo_urls = [photo.photo_url for photo in photos]
+        photo_ids = [photo.photo_id for photo in photos]
         
         # Get average rating and reviews
         reviews = Review.objects.filter(restaurant_id=restaurant)
@@ -225,6 +315,7 @@ class RestaurantDetailView(APIView):
             'latitude': restaurant.latitude,
             'longitude': restaurant.longitude,
             'photos': photo_urls,
+            'photo_ids': photo_ids,
             'reviews': formatted_reviews,
             'description': restaurant.description,
             'contact_info': restaurant.contact_info,
@@ -234,9 +325,185 @@ class RestaurantDetailView(APIView):
             'approved': restaurant.approved
         }, status=status.HTTP_200_OK)
 
+class RestaurantPageView(APIView):
+    """
+    Everything the restaurant page needs in one round-trip: detail and
+    weekly schedule, the first page of reviews, and a day's availability.
+
+    Detail and reviews are cached independently under the restaurant's cache
+    version; on a miss both are rebuilt from one prefetched restaurant query.
+    Availability and the booking counter are always read live.
+
+    Query parameters: date (YYYY-MM-DD, default today), people (default 2),
+    time (HH:MM, optional, adds the time-slots view's +/- 30 minute choices).
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    REVIEWS_PAGE_SIZE = 10
+    TIME_WINDOW = timedelta(minutes=30)
+
+    def get(self, request, restaurant_id):
+        date_str = request.query_params.get('date')
+        time_str = request.query_params.get('time')
+        try:
+            search_date = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else timezone.now().date()
+            num_people = int(request.query_params.get('people', 2))
+            search_datetime = (
+                pytz.UTC.localize(datetime.combine(search_date, datetime.strptime(time_str, "%H:%M").time()))
+                if time_str else None
+            )
+        except ValueError:
+            return Response({
+                'error': 'Invalid parameters. Use YYYY-MM-DD for date, HH:MM for time and an integer for people'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Live fields double as the existence check
+        live = Restaurant.objects.filter(restaurant_id=restaurant_id, approved=True).values('times_booked_today').first()
+        if live is None:
+            return Response({
+                'error': 'Restaurant not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        # Get the cached parts in one round-trip, rebuilding whichever are missing
+        version = restaurant_versions([restaurant_id])[restaurant_id]
+        keys = {part: restaurant_cache_key(restaurant_id, version, part) for part in ('detail', 'reviews')}
+        cached = cache.get_many(list(keys.values()))
+        parts = {part: cached.get(key) for part, key in keys.items()}
+        record_cache_lookup('restaurant_page', len(cached), len(keys) - len(cached))
+        if None in parts.values():
+            built = self.build_parts(restaurant_id)
+            if built is None:
+                return Response({
+                    'error': 'Restaurant not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+            missing = {part: data for part, data in built.items() if parts[part] is None}
+            cache.set_many({keys[part]: data for part, data in missing.items()}, timeout=settings.RESTAURANT_PAGE_CACHE_TTL)
+            parts.update(missing)
+
+        detail = parts['detail']
+        reviews = parts['reviews']
+        availability = self.get_availability(request, restaurant_id, detail['schedule'], search_date, num_people, search_datetime)
+
+        return Response({
+            'restaurant': {
+                **detail,
+                'rating': reviews['rating'],
+                'times_booked_today': live['times_booked_today'],
+            },
+            'reviews': reviews,
+            'availability': availability,
+        }, status=status.HTTP_200_OK)
+
+    def build_parts(self, restaurant_id):
+        """
+        Build the cacheable parts from one restaurant query plus prefetches
+        """
+        restaurant = (
+            Restaurant.objects
+            .filter(restaurant_id=restaurant_id, approved=True)
+            .annotate(review_count=Count('review'), avg_rating=Avg('review__rating'))
+            .prefetch_related(
+                'restauranthours_set',
+                'restaurantphoto_set',
+                Prefetch(
+                    'review_set',
+                    queryset=Review.objects.select_related('customer_id').order_by('-created_at')[:self.REVIEWS_PAGE_SIZE],
+                    to_attr='latest_reviews'
+                )
+            )
+            .first()
+        )
+        if restaurant is None:
+            return None
+
+        photos = list(restaurant.restaurantphoto_set.all())
+        schedule = [
+            {
+                'day_of_week': hours.day_of_week,
+                'open_time': hours.open_time.strftime('%H:%M'),
+                'close_time': hours.close_time.strftime('%H:%M'),
+            }
+            for hours in restaurant.restauranthours_set.all()
+        ]
+        detail = {
+            'restaurant_id': restaurant.restaurant_id,
+            'name': restaurant.name,
+            'cuisine_type': restaurant.cuisine_type,
+            'cost_rating': restaurant.cost_rating,
+            'address': restaurant.address,
+            'city': restaurant.city,
+            'state': restaurant.state,
+            'zip': restaurant.zip,
+            'latitude': restaurant.latitude,
+            'longitude': restaurant.longitude,
+            'photos': [photo.photo_url for photo in photos],
+            'photo_ids': [photo.photo_id for photo in photos],
+            'thumbnails': [photo.thumbnail_url or photo.photo_url for photo in photos],
+            'description': restaurant.description,
+            'contact_info': restaurant.contact_info,
+            'days_open': [hours['day_of_week'] for hours in schedule],
+            'opening_time': schedule[0]['open_time'] if schedule else '',
+            'closing_time': schedule[0]['close_time'] if schedule else '',
+            'schedule': schedule,
+            'approved': restaurant.approved,
+        }
+        reviews = {
+            'count': restaurant.review_count,
+            'rating': round(restaurant.avg_rating or 0, 1),
+            'results': [
+                {
+                    'review_id': review.review_id,
+                    'rating': review.rating,
+                    'comment': review.comment,
+                    'created_at': review.created_at,
+                    'customer_name': review.customer_id.username
+                }
+                for review in restaurant.latest_reviews
+            ],
+        }
+        return {'detail': detail, 'reviews': reviews}
+
+    def get_availability(self, request, restaurant_id, schedule, search_date, num_people, search_datetime):
+        """
+        Open slots for the day within opening hours, from one grouped query
+        """
+        day_of_week = search_date.strftime('%A')
+        hours = next((hours for hours in schedule if hours['day_of_week'] == day_of_week), None)
+        availability = {
+            'date': search_date.strftime('%Y-%m-%d'),
+            'people': num_people,
+            'open': hours is not None,
+            'slots': [],
+        }
+        if search_datetime is not None:
+            availability['time_slots'] = []
+        if hours is None:
+            return availability
+
+        day_start = pytz.UTC.localize(datetime.combine(search_date, datetime.strptime(hours['open_time'], '%H:%M').time()))
+        day_end = pytz.UTC.localize(datetime.combine(search_date, datetime.strptime(hours['close_time'], '%H:%M').time()))
+        slots = open_slots(
+            [restaurant_id], day_start, day_end, num_people,
+            exclude_customer=request.user if request.user.is_authenticated else None
+        )
+        for slot in slots:
+            availability['slots'].append({
+                'slot_id': slot.slot_id,
+                'slot_datetime': slot.slot_datetime,
+                'table_size': slot.table_size,
+                'total_tables': slot.total_tables,
+                'available_tables': slot.total_tables - slot.booked - slot.held,
+            })
+            if search_datetime is not None and abs(slot.slot_datetime - search_datetime) <= self.TIME_WINDOW:
+                slot_time = slot.slot_datetime.strftime("%H:%M")
+                if not any(time_slot['time'] == slot_time for time_slot in availability['time_slots']):
+                    availability['time_slots'].append({"time": slot_time, "id": slot.slot_id})
+        return availability
+
 class RestaurantSearchView(APIView):
     permission_classes = [AllowAny]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request):
         # Get search parameters
@@ -316,9 +583,9 @@ class RestaurantSearchView(APIView):
             # Get average rating
             avg_rating = Review.objects.filter(restaurant_id=restaurant).aggregate(Avg('rating'))['rating__avg'] or 0
             
-            # Get restaurant photos
+            # Get restaurant photos, preferring the resized thumbnail when it exists
             photos = RestaurantPhoto.objects.filter(restaurant_id=restaurant)
-            photo_urls = [photo.photo_url for photo in photos]
+            photo_urls = [photo.thumbnail_url or photo.photo_url for photo in photos]
             
             results.append({
                 'id': restaurant.restaurant_id,
@@ -331,17 +598,258 @@ class RestaurantSearchView(APIView):
 
         return Response(results, status=status.HTTP_200_OK)
 
+class RestaurantCardsView(APIView):
+    """
+    GET ?ids=3,1,2 - card data (as in search results) for many restaurants,
+    in the requested order.
+
+    Cards are cached per restaurant under its cache version, so a warm batch
+    costs one cache round-trip; any misses are built together in one query.
+    Unknown or unapproved ids are listed under 'missing'.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    MAX_IDS = 100
+
+    def get(self, request):
+        try:
+            ids = list(dict.fromkeys(
+                int(restaurant_id) for restaurant_id in request.query_params.get('ids', '').split(',') if restaurant_id.strip()
+            ))
+        except ValueError:
+            return Response({
+                'error': 'ids must be a comma-separated list of integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({
+                'error': 'ids is a required parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.MAX_IDS:
+            return Response({
+                'error': f'At most {self.MAX_IDS} ids per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        versions = restaurant_versions(ids)
+        keys = {restaurant_id: restaurant_cache_key(restaurant_id, versions[restaurant_id], 'card') for restaurant_id in ids}
+        cached = cache.get_many(list(keys.values()))
+        cards = {restaurant_id: cached[key] for restaurant_id, key in keys.items() if key in cached}
+
+        missing = [restaurant_id for restaurant_id in ids if restaurant_id not in cards]
+        record_cache_lookup('restaurant_card', len(cards), len(missing))
+        if missing:
+            built = self.build_cards(missing)
+            cache.set_many({keys[restaurant_id]: card for restaurant_id, card in built.items()}, timeout=settings.RESTAURANT_CARD_CACHE_TTL)
+            cards.update(built)
+
+        return Response({
+            'results': [cards[restaurant_id] for restaurant_id in ids if restaurant_id in cards],
+            'missing': [restaurant_id for restaurant_id in ids if restaurant_id not in cards]
+        }, status=status.HTTP_200_OK)
+
+    def build_cards(self, restaurant_ids):
+        """
+        Build cards for many restaurants in one query: the rating is aggregated
+        and the first photo (its thumbnail when there is one) picked in SQL
+        """
+        first_photo = (
+            RestaurantPhoto.objects
+            .filter(restaurant_id=OuterRef('pk'))
+            .order_by('position', 'photo_id')
+            .annotate(url=Coalesce('thumbnail_url', 'photo_url'))
+            .values('url')[:1]
+        )
+        rows = (
+            Restaurant.objects
+            .filter(restaurant_id__in=restaurant_ids, approved=True)
+            .annotate(avg_rating=Avg('review__rating'), image_url=Subquery(first_photo))
+            .values('restaurant_id', 'name', 'cuisine_type', 'cost_rating', 'avg_rating', 'image_url')
+        )
+        return {
+            row['restaurant_id']: {
+                'id': row['restaurant_id'],
+                'name': row['name'],
+                'cuisine': row['cuisine_type'],
+                'ratePerPerson': row['cost_rating'],
+                'rating': round(row['avg_rating'] or 0, 1),
+                'imageURL': row['image_url'] or [],
+            }
+            for row in rows
+        }
+
 class ManagerRestaurantsView(generics.ListAPIView):
     serializer_class = RestaurantSerializer
     permission_classes = [permissions.IsAuthenticated, IsRestaurantManager]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get_queryset(self):
         return Restaurant.objects.filter(manager_id=self.request.user)
 
+class ManagerAnalyticsView(APIView):
+    """
+    Occupancy, booking heatmaps and cancellation rates for the manager's restaurants.
+
+    Runs four grouped queries whatever the number of slots: restaurants,
+    per-slot counts, slot capacity per (day, hour) and bookings per (day, hour).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsRestaurantManager]
+    authentication_classes = [ClaimsJWTAuthentication]
+
+    # Longest range that can be requested in one call
+    MAX_RANGE_DAYS = 92
+    # Bookings a (day, hour) needs before its cancellation rate is reported
+    MIN_BOOKINGS_FOR_RATE = 3
+
+    def get(self, request):
+        try:
+            end_date = datetime.strptime(request.query_params['end'], "%Y-%m-%d").date() \
+                if request.query_params.get('end') else datetime.now(pytz.UTC).date()
+            start_date = datetime.strptime(request.query_params['start'], "%Y-%m-%d").date() \
+                if request.query_params.get('start') else end_date - timedelta(days=30)
+        except ValueError:
+            return Response({
+                'error': 'Invalid date format. Use YYYY-MM-DD for start and end'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not timedelta(0) <= end_date - start_date <= timedelta(days=self.MAX_RANGE_DAYS):
+            return Response({
+                'error': f'start must be before end and at most {self.MAX_RANGE_DAYS} days apart'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        restaurants = Restaurant.objects.filter(manager_id=request.user)
+        if request.query_params.get('restaurant_id'):
+            try:
+                restaurant_id = int(request.query_params['restaurant_id'])
+            except ValueError:
+                return Response({
+                    'error': 'restaurant_id must be an integer'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            restaurants = restaurants.filter(restaurant_id=restaurant_id)
+        restaurants = list(restaurants.values('restaurant_id', 'name'))
+        restaurant_ids = [restaurant['restaurant_id'] for restaurant in restaurants]
+        logger.info(f"Building occupancy analytics for {len(restaurant_ids)} restaurants of manager {request.user.username}")
+
+        slots = BookingSlot.objects.filter(
+            restaurant_id__in=restaurant_ids,
+            slot_datetime__date__range=(start_date, end_date)
+        )
+        bookings = Booking.objects.filter(
+            slot_id__restaurant_id__in=restaurant_ids,
+            slot_id__slot_datetime__date__range=(start_date, end_date)
+        )
+
+        # Per-slot occupancy
+        slot_rows = (
+            slots.values('slot_id', 'restaurant_id', 'slot_datetime', 'table_size', 'total_tables')
+            .annotate(booked=Count('booking', filter=Q(booking__status='Booked')))
+            .order_by('slot_datetime', 'table_size')
+        )
+
+        # Capacity and bookings per (restaurant, day of week, hour)
+        capacity_grid = (
+            slots.values('restaurant_id', day=ExtractIsoWeekDay('slot_datetime'), hour=ExtractHour('slot_datetime'))
+            .annotate(capacity=Sum('total_tables'))
+            .order_by()
+        )
+        booking_grid = (
+            bookings.values(
+                restaurant=F('slot_id__restaurant_id'),
+                day=ExtractIsoWeekDay('slot_id__slot_datetime'),
+                hour=ExtractHour('slot_id__slot_datetime')
+            )
+            .annotate(
+                booked=Count('booking_id', filter=Q(status='Booked')),
+                cancelled=Count('booking_id', filter=Q(status='Cancelled'))
+            )
+            .order_by()
+        )
+
+        results = {
+            restaurant['restaurant_id']: {
+                'restaurant_id': restaurant['restaurant_id'],
+                'name': restaurant['name'],
+                'slots': [],
+                'grid': {},
+            }
+            for restaurant in restaurants
+        }
+        for row in slot_rows:
+            results[row['restaurant_id']]['slots'].append({
+                'slot_id': row['slot_id'],
+                'slot_datetime': row['slot_datetime'],
+                'table_size': row['table_size'],
+                'total_tables': row['total_tables'],
+                'booked': row['booked'],
+                'occupancy': ratio(row['booked'], row['total_tables'])
+            })
+        for row in capacity_grid:
+            cell = results[row['restaurant_id']]['grid'].setdefault((row['day'], row['hour']), [0, 0, 0])
+            cell[0] = row['capacity'] or 0
+        for row in booking_grid:
+            cell = results[row['restaurant']]['grid'].setdefault((row['day'], row['hour']), [0, 0, 0])
+            cell[1] = row['booked']
+            cell[2] = row['cancelled']
+
+        data = [self.summarize(result) for result in results.values()]
+        return Response({
+            'date_range': {
+                'start': start_date,
+                'end': end_date
+            },
+            'restaurants': data
+        }, status=status.HTTP_200_OK)
+
+    def summarize(self, result):
+        """
+        Fold the (day, hour) grid of [capacity, booked, cancelled] into heatmaps
+        """
+        grid = result.pop('grid')
+        by_day = [[0, 0, 0] for _ in DAY_NAMES]
+        by_hour = [[0, 0, 0] for _ in range(24)]
+        for (day, hour), cell in grid.items():
+            for index in range(3):
+                by_day[day - 1][index] += cell[index]
+                by_hour[hour][index] += cell[index]
+
+        capacity, booked, cancelled = (sum(cell[index] for cell in grid.values()) for index in range(3))
+
+        # Only Booked/Cancelled are tracked, so cancellation rate per time is the no-show proxy
+        prone_times = sorted(
+            (
+                {
+                    'day': DAY_NAMES[day - 1],
+                    'hour': hour,
+                    'bookings': cell[1] + cell[2],
+                    'cancelled': cell[2],
+                    'cancellation_rate': ratio(cell[2], cell[1] + cell[2])
+                }
+                for (day, hour), cell in grid.items()
+                if cell[2] and cell[1] + cell[2] >= self.MIN_BOOKINGS_FOR_RATE
+            ),
+            key=lambda item: (-item['cancellation_rate'], -item['bookings'])
+        )[:5]
+
+        return {
+            **result,
+            'total_capacity': capacity,
+            'booked': booked,
+            'occupancy': ratio(booked, capacity),
+            'cancellation_rate': ratio(cancelled, booked + cancelled),
+            'day_of_week': [
+                {'day': DAY_NAMES[index], 'capacity': cell[0], 'booked': cell[1], 'occupancy': ratio(cell[1], cell[0])}
+                for index, cell in enumerate(by_day)
+            ],
+            'hour_of_day': [
+                {'hour': hour, 'capacity': cell[0], 'booked': cell[1], 'occupancy': ratio(cell[1], cell[0])}
+                for hour, cell in enumerate(by_hour)
+                if cell[0] or cell[1] or cell[2]
+            ],
+            'no_show_prone_times': prone_times
+        }
+
 class HotRestaurantsView(APIView):
     permission_classes = [AllowAny]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
 
     def get(self, request):
         # Get pagination parameters
@@ -362,9 +870,9 @@ class HotRestaurantsView(APIView):
             thirty_days_ago = datetime.now() - timedelta(days=30)
             recent_reviews = reviews.filter(created_at__gte=thirty_days_ago).count()
             
-            # Get restaurant photos
+            # Get restaurant photos, preferring the resized thumbnail when it exists
             photos = RestaurantPhoto.objects.filter(restaurant_id=restaurant)
-            photo_urls = [photo.photo_url for photo in photos]
+            photo_urls = [photo.thumbnail_url or photo.photo_url for photo in photos]
             
             # Calculate a "hotness score" based on multiple factors:
             # 1. Current bookings (40% weight)
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from backend.metrics import record_cache_lookup
+from .models import User
+from .token import USER_CLAIMS
+
+_user_cache = {}
+_user_cache_lock = threading.Lock()
+
+
+def get_cached_user(user_id):
+    """
+    Return the full User row, served from a short-lived in-process cache.
+
+    Used by the few paths that need more than the token claims (e.g. the
+    user's email address). Raises User.DoesNotExist for unknown ids.
+    """
+    now = time.monotonic()
+    entry = _user_cache.get(user_id)
+    if entry is not None and entry[0] > now:
+        record_cache_lookup('user', 1, 0)
+        return entry[1]
+    record_cache_lookup('user', 0, 1)
+
+    user = User.objects.get(user_id=user_id)
+    with _user_cache_lock:
+        if len(_user_cache) >= settings.USER_CACHE_MAX_SIZE:
+            # Drop expired entries first, then the oldest ones
+            for key in [key for key, (expires, _) in _user_cache.items() if expires <= now]:
+                del _user_cache[key]
+            while len(_user_cache) >= settings.USER_CACHE_MAX_SIZE:
+                del _user_cache[next(iter(_user_cache))]
+        _user_cache[user_id] = (now + settings.USER_CACHE_TTL, user)
+    return user
+
+
+def invalidate_cached_user(user_id):
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+def user_from_claims(validated_token):
+    """
+    Build a User instance from token claims without touching the database.
+
+    Only the primary key and the claim fields are loaded; every other field is
+    deferred, so it is fetched on first access. The instance can be used for
+    role checks, ORM filters and foreign key assignment as-is.
+    """
+    values = {'user_id': validated_token[api_settings.USER_ID_CLAIM]}
+    values.update((claim, validated_token[claim]) for claim in USER_CLAIMS)
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    return User.from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that answers role and active checks from token claims.
+
+    Tokens issued by ``create_jwt_pair_for_user`` carry the user's role and
+    active flag, so authenticating them costs no user query. Role changes and
+    deactivation take effect when the access token is next refreshed, at most
+    ACCESS_TOKEN_LIFETIME later: ClaimsTokenRefreshSerializer rebuilds the
+    claims from the user row on every refresh.
+    Tokens without the claims fall back to the cached user lookup.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if all(claim in validated_token for claim in USER_CLAIMS):
+            user = user_from_claims(validated_token)
+        else:
+            try:
+                user = get_cached_user(user_id)
+            except User.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
+
+
+async def aauthenticate(request):
+    """
+    Authenticate a plain Django request from an async view.
+
+    Returns the user, or None when no bearer token was sent. Tokens carrying
+    the user claims are checked without leaving the event loop; others fall
+    back to the cached user lookup in a worker thread.
+    """
+    authenticator = ClaimsJWTAuthentication()
+    header = authenticator.get_header(request)
+    if header is None:
+        return None
+    raw_token = authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+    validated_token = authenticator.get_validated_token(raw_token)
+    if all(claim in validated_token for claim in USER_CLAIMS):
+        return authenticator.get_user(validated_token)
+    return await sync_to_async(authenticator.get_user)(validated_token)
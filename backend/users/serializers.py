@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from .models import User
+from .token import add_user_claims
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -17,4 +21,25 @@ class UserSerializer(serializers.ModelSerializer):
             role=validated_data['role'],
             phone=validated_data.get('phone', '')
         )
-        return user
\ No newline at end of file
+        return user
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-read the user's claims on refresh. The refresh token carries the claims
+    it was issued with, and every access token minted from it copies them, so
+    without this a role change would wait for the refresh token to expire.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        add_user_claims(refresh, user)
+        return super().validate({**attrs, 'refresh': str(refresh)})
@@ -3,10 +3,19 @@ from rest_framework_simplejwt.tokens import RefreshToken
 
 User = get_user_model()
 
+# Claims embedded in every token so permission checks need no database lookup
+USER_CLAIMS = ('username', 'role', 'is_active')
+
+
+def add_user_claims(token, user: User):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
 
 def create_jwt_pair_for_user(user: User):
-    refresh = RefreshToken.for_user(user)
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
 
     tokens = {"access": str(refresh.access_token), "refresh": str(refresh)}
 
-    return tokens
\ No newline at end of file
+    return tokens
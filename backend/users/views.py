@@ -5,6 +5,7 @@ from .serializers import UserSerializer
 from .models import User
 from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
+from .token import create_jwt_pair_for_user
 import logging
 
 # Get logger for users app
@@ -25,17 +26,14 @@ class RegisterView(APIView):
                 password=data.get('password'),
                 role=data.get('role', 'Customer')
             )
-            # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            # Generate JWT tokens carrying the user's role claims
+            tokens = create_jwt_pair_for_user(user)
             
             logger.info(f"User registered successfully: {user.username}")
             # Return the serialized user data along with tokens
             return Response({
                 'user': UserSerializer(user).data,
-                'tokens': {
-                    'access': str(refresh.access_token),
-                    'refresh': str(refresh)
-                }
+                'tokens': tokens
             }, status=status.HTTP_201_CREATED)
         logger.warning(f"Registration failed for username: {request.data.get('username')} - Validation errors: {serializer.errors}")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -55,16 +53,13 @@ class LoginView(APIView):
         
         if user.check_password(request.data.get('password')):
             serializer = UserSerializer(user)
-            # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            # Generate JWT tokens carrying the user's role claims
+            tokens = create_jwt_pair_for_user(user)
             
             logger.info(f"User logged in successfully: {username}")
             return Response({
                 'user': serializer.data,
-                'tokens': {
-                    'access': str(refresh.access_token),
-                    'refresh': str(refresh)
-                }
+                'tokens': tokens
             }, status=status.HTTP_200_OK)
         else:
             logger.warning(f"Login failed: Invalid password for user - {username}")